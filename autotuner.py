@@ -0,0 +1,208 @@
+import time
+
+from dynamicallocation import DynamicAllocation
+from memallocation import weightedRanking
+
+"""
+Class AdaptiveAllocation
+DynamicAllocation that chooses its own placement algorithm while events come in
+
+A small shadow simulation of every candidate algorithm runs next to the real allocator. Shadows see a sample of the
+stream: every sampleEvery-th memory block and the allocate/free events of about one in sampleEvery processes (picked by
+a hash of the process number, so a sampled process is both allocated and freed in the shadows). Keeping memory and
+processes at the same rate keeps the shadows about as full as the real allocator, and each shadow does about
+1/sampleEvery of the real work.
+
+Every epochEvents events the shadows are compared on the epoch just finished: failed allocations, fragmentation of
+free memory (1 - largest hole / free memory) and time spent. They are ranked with memallocation.weightedRanking and the
+active algorithm is switched when another one scores better by more than switchMargin. Each metric is scaled from 0 to
+1 across the shadows, so timing noise alone can outweigh switchMargin: the default weights leave time out, so the
+same trace always gives the same switches, and weighting executionTime trades that for choosing faster algorithms.
+
+Attributes (in addition to DynamicAllocation's):
+    candidates - list, algorithms the tuner chooses between
+    sampleEvery - int, shadows see one in sampleEvery blocks and processes
+    epochEvents - int, events between tuning decisions
+    weights - dictionary, weight of failedAllocations, fragmentation and executionTime (wall clock, not reproducible)
+              when ranking the shadows
+    switchMargin - float, how much better (in weighted score) another algorithm must be to switch to it
+    shadows - dictionary, DynamicAllocation shadow of each candidate algorithm
+    policyHistory - list, (event number, algorithm) each time the active algorithm was chosen
+    tuningTimeNs - int, time spent on shadows and tuning decisions, in nanoseconds
+
+Methods:
+    sampled(processID) - returns whether a process's events are sent to the shadows
+    allocate(processID, processSize) - DynamicAllocation.allocate, also feeding the shadows
+    free(processID) - DynamicAllocation.free, also feeding the shadows (processes that could not be allocated may be freed)
+    fork() - returns an independent copy of the allocator, shadows included
+    tune() - compares the shadows on the last epoch and switches the active algorithm if another is clearly better
+"""
+
+
+class AdaptiveAllocation(DynamicAllocation):
+    # executionTime is left out so tuning is deterministic, add it to weights to also favour faster algorithms
+    defaultWeights = {"failedAllocations": 1.0, "fragmentation": 1.0}
+
+    """
+    Initialize AdaptiveAllocation with free memory blocks and a shadow simulation of every candidate algorithm
+
+    Args:
+        blocks - list, array of memory block sizes
+        algName - str, algorithm used until the first tuning decision
+        sampleEvery - int, shadows see one in sampleEvery blocks and processes (fewer if there are fewer blocks)
+        epochEvents - int, events between tuning decisions
+        weights - dictionary, weights for ranking the shadows, None uses defaultWeights
+        switchMargin - float, how much better another algorithm must score to switch to it
+        candidates - list, algorithms to choose between, None uses every fit (DynamicAllocation.fitAlgorithms); buddy
+                     keeps its holes as chunks the fits do not share, so it can not be switched to or from
+        checkMetrics - bool, check the running totals against a full recalculation every time metrics() is called
+    """
+
+    def __init__(self, blocks, algName="first fit", sampleEvery=64, epochEvents=1024, weights=None, switchMargin=0.1,
+                 candidates=None, checkMetrics=False):
+        self.candidates = list(self.fitAlgorithms if candidates is None else candidates)
+        for candidate in [algName] + self.candidates:
+            if candidate not in self.fitAlgorithms:
+                raise ValueError(f"cannot tune with {candidate!r}, expected one of {self.fitAlgorithms}")
+        super().__init__(blocks, algName, checkMetrics)
+        self.sampleEvery = max(1, min(sampleEvery, len(self.blockCapacity)))
+        self.epochEvents = epochEvents
+        self.weights = self.defaultWeights if weights is None else weights
+        self.switchMargin = switchMargin
+        shadowBlocks = self.blockCapacity[::self.sampleEvery]
+        self.shadows = {candidate: DynamicAllocation(shadowBlocks, candidate) for candidate in self.candidates}
+        # per shadow failed allocations at the start of the epoch and time spent during it
+        self.epochFailures = dict.fromkeys(self.candidates, 0)
+        self.epochTimes = dict.fromkeys(self.candidates, 0)
+        self.eventCount = 0
+        self.policyHistory = [(0, algName)]
+        self.tuningTimeNs = 0
+
+    """
+    Whether a process's events are sent to the shadows, about one process in sampleEvery
+
+    Args:
+        processID - int, process number
+
+    Returns:
+        sampled - bool
+    """
+
+    def sampled(self, processID):
+        # multiplicative hash so runs of process numbers are not sampled in a fixed pattern
+        return (processID * 2654435761) % 4294967296 < 4294967296 // self.sampleEvery
+
+    """
+    Allocate a process with the active algorithm, and in the shadows if it is sampled
+
+    Args:
+        processID - int, process number
+        processSize - int, process size
+
+    Returns:
+        allocated - bool, False if no hole was large enough
+    """
+
+    def allocate(self, processID, processSize):
+        allocated = super().allocate(processID, processSize)
+        if self.sampled(processID):
+            startTime = time.perf_counter_ns()
+            for candidate, shadow in self.shadows.items():
+                shadowStart = time.perf_counter_ns()
+                shadow.allocate(processID, processSize)
+                self.epochTimes[candidate] += time.perf_counter_ns() - shadowStart
+            self.tuningTimeNs += time.perf_counter_ns() - startTime
+        self.countEvent()
+        return allocated
+
+    """
+    Free a process's memory, and in the shadows if it is sampled. Unlike DynamicAllocation, freeing a process that
+    could not be allocated is allowed, the free still has to reach the shadows that did allocate it
+
+    Args:
+        processID - int, process number
+    """
+
+    def free(self, processID):
+        if processID >= len(self.processBlocks):
+            raise ValueError(f"process {processID} is not allocated")
+        if self.processBlocks[processID] != -1:
+            super().free(processID)
+        if self.sampled(processID):
+            startTime = time.perf_counter_ns()
+            for candidate, shadow in self.shadows.items():
+                # the process may not have fit in this shadow
+                if processID < len(shadow.processBlocks) and shadow.processBlocks[processID] != -1:
+                    shadowStart = time.perf_counter_ns()
+                    shadow.free(processID)
+                    self.epochTimes[candidate] += time.perf_counter_ns() - shadowStart
+            self.tuningTimeNs += time.perf_counter_ns() - startTime
+        self.countEvent()
+
+    """
+    Copy the allocator, its shadows and tuning state, so the copy tunes on its own from the same point
+
+    Returns:
+        forked - AdaptiveAllocation
+    """
+
+    def fork(self):
+        forked = super().fork()
+        forked.shadows = {candidate: shadow.fork() for candidate, shadow in self.shadows.items()}
+        forked.epochFailures = dict(self.epochFailures)
+        forked.epochTimes = dict(self.epochTimes)
+        forked.policyHistory = list(self.policyHistory)
+        return forked
+
+    """
+    Count an event, tuning at the end of every epoch
+    """
+
+    def countEvent(self):
+        self.eventCount += 1
+        if self.eventCount % self.epochEvents == 0:
+            self.tune()
+
+    """
+    Compare the shadows on the epoch just finished and switch the active algorithm if another one is clearly better
+
+    Returns:
+        scores - dictionary, weighted score of each candidate for the epoch, lower is better
+    """
+
+    def tune(self):
+        startTime = time.perf_counter_ns()
+        results = {}
+        for candidate, shadow in self.shadows.items():
+            freeMem = shadow.totalMem
+            largestHole = shadow.largestHole()
+            results[candidate] = {"failedAllocations": shadow.failedAllocations - self.epochFailures[candidate],
+                                  "fragmentation": 1 - largestHole / freeMem if freeMem else 0.0,
+                                  "executionTime": self.epochTimes[candidate]}
+            self.epochFailures[candidate] = shadow.failedAllocations
+            self.epochTimes[candidate] = 0
+        scores = dict(weightedRanking(results, self.weights))
+        best = min(scores, key=scores.get)
+        current = scores.get(self.algName)
+        if best != self.algName and (current is None or current - scores[best] > self.switchMargin):
+            self.algName = best
+            self.policyHistory.append((self.eventCount, best))
+        self.tuningTimeNs += time.perf_counter_ns() - startTime
+        return scores
+
+
+if __name__ == "__main__":
+    from benchmark import generateChurn, runChurn
+
+    blocksExample, eventsExample = generateChurn("bimodal", 2000, 40000)
+    memoryAllocator = AdaptiveAllocation(blocksExample)
+    history, executionTime = memoryAllocator.run(eventsExample, sampleEvery=len(eventsExample))
+    print(f"Adaptive: {memoryAllocator.failedAllocations} failed allocations, {executionTime:.3f} s, "
+          f"{memoryAllocator.tuningTimeNs / memoryAllocator.executionTimeNs:.1%} of it tuning")
+    print("Algorithm chosen: " + ", ".join(f"{algName} (event {eventNumber})"
+                                           for eventNumber, algName in memoryAllocator.policyHistory))
+    for algName in DynamicAllocation.algorithms:
+        startTime = time.perf_counter_ns()
+        fixedAllocator = runChurn(blocksExample, eventsExample, algName)
+        executionTime = (time.perf_counter_ns() - startTime) / 1e9
+        print(f"{algName}: {fixedAllocator.failedAllocations} failed allocations, {executionTime:.3f} s")
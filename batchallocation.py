@@ -0,0 +1,192 @@
+import time
+
+import numpy as np
+
+"""
+Batch evaluation of many (blocks, processes) scenarios at once with NumPy
+
+Each scenario is one row of a 2-D array, so every algorithm places process p for all scenarios in a single set of
+array operations instead of running MemoryAllocation once per scenario. Rows of different lengths are padded with -1,
+a padded block never fits a process and a padded process is skipped.
+
+Functions:
+    padRows(rows) - given a list of lists, returns a 2-D int64 array padded with -1
+    batchAllocation(blocks, processes, algName) - runs one algorithm over every scenario,
+                                        returns final free block sizes, block number each process was allocated to (-1 if not allocated),
+                                        and execution time
+    batchMetrics(blockSizes, freeBlocks, processes, processBlocks) - calculates MemoryAllocation.metrics() for every scenario
+    batchBestAlgorithm(blocks, processes, determinant) - runs every algorithm over every scenario,
+                                        returns name of best algorithm for each scenario, structured results array
+                                        and block number each process was allocated to for each algorithm
+"""
+
+batchAlgorithms = ["first fit", "next fit", "best fit", "worst fit"]
+
+# one row of results per scenario and algorithm, same fields as MemoryAllocation.bestAlgorithm results
+resultsDtype = np.dtype([("totalMem", np.int64), ("allocatedMem", np.int64), ("internalFragmentation", np.int64),
+                         ("externalFragmentation", np.int64), ("executionTime", np.float64)])
+
+"""
+Pad lists of different lengths into one 2-D array
+
+Args:
+    rows - list, list of block or process size lists
+
+Returns:
+    padded - 2-D int64 array, one row per list, missing entries set to -1
+"""
+
+
+def padRows(rows):
+    width = max((len(row) for row in rows), default=0)
+    padded = np.full((len(rows), width), -1, dtype=np.int64)
+    for i, row in enumerate(rows):
+        padded[i, :len(row)] = row
+    return padded
+
+
+"""
+Run one allocation algorithm over every scenario at once
+
+Args:
+    blocks - 2-D array, memory block sizes, one scenario per row (-1 for padding)
+    processes - 2-D array, process sizes, one scenario per row (-1 for padding)
+    algName - str, one of batchAlgorithms
+
+Returns:
+    freeBlocks - 2-D int64 array, free memory left in each block
+    processBlocks - 2-D int64 array, block number each process was allocated to, -1 if not allocated
+    executionTime - float, time execution took for the whole batch
+"""
+
+
+def batchAllocation(blocks, processes, algName):
+    freeBlocks = np.array(blocks, dtype=np.int64, ndmin=2)
+    processes = np.array(processes, dtype=np.int64, ndmin=2)
+    scenarioCount, blockCount = freeBlocks.shape
+    processBlocks = np.full(processes.shape, -1, dtype=np.int64)
+    if blockCount == 0:
+        return freeBlocks, processBlocks, 0.0
+    scenarios = np.arange(scenarioCount)
+    blockIDs = np.arange(blockCount)
+    # keep track of last block allocated in each scenario for next fit
+    lastAllocated = np.zeros(scenarioCount, dtype=np.int64)
+    # time the algorithm execution
+    startTime = time.perf_counter_ns()
+    for processID in range(processes.shape[1]):
+        processSize = processes[:, processID]
+        # blocks large enough for the process, padded processes fit nowhere
+        fits = (freeBlocks >= processSize[:, None]) & (processSize >= 0)[:, None]
+        allocated = fits.any(axis=1)
+        if algName == "first fit":
+            blockID = fits.argmax(axis=1)
+        elif algName == "next fit":
+            # first fit from the last block allocated, wrapping around to the first block if nothing fits after it
+            fitsAfter = fits & (blockIDs >= lastAllocated[:, None])
+            blockID = np.where(fitsAfter.any(axis=1), fitsAfter.argmax(axis=1), fits.argmax(axis=1))
+            lastAllocated = np.where(allocated, blockID, lastAllocated)
+        elif algName == "best fit":
+            blockID = np.where(fits, freeBlocks, np.iinfo(np.int64).max).argmin(axis=1)
+        elif algName == "worst fit":
+            blockID = np.where(fits, freeBlocks, -1).argmax(axis=1)
+        else:
+            raise ValueError(f"unknown algorithm {algName!r}, expected one of {batchAlgorithms}")
+        processBlocks[:, processID] = np.where(allocated, blockID, -1)
+        freeBlocks[scenarios, blockID] -= np.where(allocated, processSize, 0)
+    endTime = time.perf_counter_ns()
+    executionTime = (endTime - startTime) / 1e9
+    return freeBlocks, processBlocks, executionTime
+
+
+"""
+Calculates MemoryAllocation.metrics() for every scenario
+
+Args:
+    blockSizes - 2-D array, memory block sizes before allocation (-1 for padding)
+    freeBlocks - 2-D array, free memory left in each block after allocation
+    processes - 2-D array, process sizes (-1 for padding)
+    processBlocks - 2-D array, block number each process was allocated to, -1 if not allocated
+
+Returns:
+    totalMem, allocatedMem, internalFragmentTotal, externalFragmentTotal - int64 arrays, one entry per scenario
+"""
+
+
+def batchMetrics(blockSizes, freeBlocks, processes, processBlocks):
+    blockSizes = np.array(blockSizes, dtype=np.int64, ndmin=2)
+    processes = np.array(processes, dtype=np.int64, ndmin=2)
+    # total available memory for future allocations, sum of all free mem blocks (ignoring padding)
+    totalMem = np.where(blockSizes >= 0, freeBlocks, 0).sum(axis=1)
+    isAllocated = processBlocks != -1
+    # total memory in use, sum of sizes of allocated processes
+    allocatedMem = np.where(isAllocated, processes, 0).sum(axis=1)
+    # free memory left in blocks holding processes, as in MemoryAllocation.metrics()
+    occupied = np.zeros(freeBlocks.shape, dtype=bool)
+    scenarios, processIDs = np.nonzero(isAllocated)
+    occupied[scenarios, processBlocks[scenarios, processIDs]] = True
+    internalFragmentTotal = np.where(occupied, freeBlocks, 0).sum(axis=1)
+    # each block's free memory is one hole at its end: free memory in blocks holding no process, less the largest hole
+    # (lowest block on ties) if it is one of them
+    holes = np.where(blockSizes >= 0, freeBlocks, 0)
+    externalFragmentTotal = np.where(occupied, 0, holes).sum(axis=1)
+    if holes.shape[1]:
+        largestBlock = holes.argmax(axis=1)
+        rows = np.arange(holes.shape[0])
+        externalFragmentTotal -= np.where(occupied[rows, largestBlock], 0, holes[rows, largestBlock])
+    return totalMem, allocatedMem, internalFragmentTotal, externalFragmentTotal
+
+
+"""
+Determines best algorithm for every scenario, for given determinant
+
+Args:
+    blocks - 2-D array or list of lists, memory block sizes, one scenario per row
+    processes - 2-D array or list of lists, process sizes, one scenario per row
+    determinant - str, what algorithms should be judged on
+                could be: [totalMem, allocatedMem, internalFragmentation, externalFragmentation, executionTime]
+
+Returns:
+    bestAlgs - list, name of best suited algorithm for each scenario
+    results - structured array (resultsDtype), shape (scenarios, len(batchAlgorithms)), metrics of each algorithm
+              executionTime is the batch execution time divided by the number of scenarios
+    processBlocks - int64 array, shape (scenarios, len(batchAlgorithms), processes), allocations of each algorithm
+"""
+
+
+def batchBestAlgorithm(blocks, processes, determinant):
+    if not isinstance(blocks, np.ndarray):
+        blocks = padRows(blocks)
+    if not isinstance(processes, np.ndarray):
+        processes = padRows(processes)
+    blocks = np.array(blocks, dtype=np.int64, ndmin=2)
+    processes = np.array(processes, dtype=np.int64, ndmin=2)
+    scenarioCount = blocks.shape[0]
+    results = np.zeros((scenarioCount, len(batchAlgorithms)), dtype=resultsDtype)
+    allProcessBlocks = np.full((scenarioCount, len(batchAlgorithms), processes.shape[1]), -1, dtype=np.int64)
+    for i, algName in enumerate(batchAlgorithms):
+        freeBlocks, processBlocks, executionTime = batchAllocation(blocks, processes, algName)
+        totalMem, allocatedMem, internalFragmentTotal, externalFragmentTotal = batchMetrics(
+            blocks, freeBlocks, processes, processBlocks)
+        results["totalMem"][:, i] = totalMem
+        results["allocatedMem"][:, i] = allocatedMem
+        results["internalFragmentation"][:, i] = internalFragmentTotal
+        results["externalFragmentation"][:, i] = externalFragmentTotal
+        results["executionTime"][:, i] = executionTime / max(scenarioCount, 1)
+        allProcessBlocks[:, i, :] = processBlocks
+
+    # determine best algorithm for each scenario based on given determinant, first algorithm on ties
+    bestAlgs = [batchAlgorithms[i] for i in results[determinant].argmin(axis=1)]
+    return bestAlgs, results, allProcessBlocks
+
+
+if __name__ == "__main__":
+    blocksExample = [[50, 150, 300, 350, 600], [100, 500, 200, 300, 600]]
+    processesExample = [[300, 25, 125, 50], [212, 417, 112, 426]]
+
+    bestAlgs, results, processBlocks = batchBestAlgorithm(blocksExample, processesExample, 'externalFragmentation')
+    for scenario, bestAlg in enumerate(bestAlgs):
+        print(f"Scenario {scenario}: the best memory allocation algorithm is: {bestAlg}")
+        for i, algorithmName in enumerate(batchAlgorithms):
+            metrics = results[scenario, i]
+            print(
+                f"{algorithmName}: Total Available Memory={metrics['totalMem']} KB, Allocated Memory in Use={metrics['allocatedMem']} KB, External Fragmentation={metrics['externalFragmentation']} KB, Internal Fragmentation={metrics['internalFragmentation']} KB")
@@ -0,0 +1,380 @@
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+
+from autotuner import AdaptiveAllocation
+from compaction import CompactingAllocation
+from dynamicallocation import DynamicAllocation
+from memallocation import MemoryAllocation
+
+"""
+Benchmarks for the placement algorithms on generated workloads
+
+Workloads are generated from a seed, so the same arguments always give the same blocks, processes and events and
+results can be compared between commits. Every algorithm is timed on every engine:
+    scan - MemoryAllocation's original methods, every block is looked at for each process
+    indexed - MemoryAllocation's segment tree / size index methods
+    batch - batchallocation.py, NumPy over a batch of scenarios (only run when asked for, needs NumPy)
+    dynamic - DynamicAllocation on an allocate/free churn trace, the fits and buddy with merging
+    adaptive - AdaptiveAllocation (autotuner.py) on the same churn trace, choosing its algorithm as it runs
+    compacting - CompactingAllocation (compaction.py) on the same churn trace, compacting when an allocation fails
+
+Results are written as JSON lines, one record per workload, engine and algorithm, with the best and median time of
+the repeats in nanoseconds.
+
+Functions:
+    sampleSize(rng, distribution, mean) - draws one size from a uniform, exponential or bimodal distribution
+    generateWorkload(distribution, blockCount, processCount, seed) - returns block sizes and process sizes
+    generateChurn(distribution, blockCount, eventCount, freeChance, seed) - returns block sizes and allocate/free events
+    timeRuns(function, repeat) - returns times of repeat calls to function, in nanoseconds
+    runBenchmarks(distributions, blockCounts, engines, repeat, seed, maxScanWork) - yields benchmark result records
+    compareResults(baseline, current, tolerance) - returns records whose median time grew by more than tolerance
+"""
+
+distributions = ["uniform", "exponential", "bimodal"]
+engineNames = ["scan", "indexed", "batch", "dynamic", "adaptive", "compacting"]
+# mean process size, blocks are blockScale times larger on average
+meanProcessSize = 100
+blockScale = 4
+
+"""
+Draw one size from a distribution
+
+Args:
+    rng - random.Random, seeded random generator
+    distribution - str, one of distributions
+    mean - int, mean size
+
+Returns:
+    size - int, at least 1
+"""
+
+
+def sampleSize(rng, distribution, mean):
+    if distribution == "uniform":
+        return rng.randint(1, 2 * mean - 1)
+    if distribution == "exponential":
+        return max(1, int(rng.expovariate(1 / mean)))
+    if distribution == "bimodal":
+        # mostly small sizes with a few large ones, mean stays close to mean
+        if rng.random() < 0.8:
+            return max(1, int(rng.gauss(mean / 4, mean / 16)))
+        return max(1, int(rng.gauss(4 * mean, mean)))
+    raise ValueError(f"unknown distribution {distribution!r}, expected one of {distributions}")
+
+
+"""
+Generate a one pass workload
+
+Args:
+    distribution - str, one of distributions
+    blockCount - int, number of memory blocks
+    processCount - int, number of processes
+    seed - int, random seed
+
+Returns:
+    blocks - list, memory block sizes
+    processes - list, process sizes
+"""
+
+
+def generateWorkload(distribution, blockCount, processCount, seed=0):
+    rng = random.Random(f"{seed}-{distribution}-{blockCount}-{processCount}")
+    blocks = [sampleSize(rng, distribution, meanProcessSize * blockScale) for _ in range(blockCount)]
+    processes = [sampleSize(rng, distribution, meanProcessSize) for _ in range(processCount)]
+    return blocks, processes
+
+
+"""
+Generate an allocate/free churn trace, live processes are freed at random
+
+Args:
+    distribution - str, one of distributions
+    blockCount - int, number of memory blocks
+    eventCount - int, number of events
+    freeChance - float, chance each event frees a live process instead of allocating a new one
+    seed - int, random seed
+
+Returns:
+    blocks - list, memory block sizes
+    events - list, ("allocate", processID, size) and ("free", processID) events
+"""
+
+
+def generateChurn(distribution, blockCount, eventCount, freeChance=0.4, seed=0):
+    rng = random.Random(f"{seed}-churn-{distribution}-{blockCount}-{eventCount}")
+    blocks = [sampleSize(rng, distribution, meanProcessSize * blockScale) for _ in range(blockCount)]
+    events = []
+    live = []
+    nextProcess = 0
+    for _ in range(eventCount):
+        if live and rng.random() < freeChance:
+            # swap a random live process to the end and free it
+            i = rng.randrange(len(live))
+            live[i], live[-1] = live[-1], live[i]
+            events.append(("free", live.pop()))
+        else:
+            events.append(("allocate", nextProcess, sampleSize(rng, distribution, meanProcessSize)))
+            live.append(nextProcess)
+            nextProcess += 1
+    return blocks, events
+
+
+"""
+Time repeated calls to a function
+
+Args:
+    function - callable, called with no arguments, returns its own execution time in seconds or None
+    repeat - int, number of calls
+
+Returns:
+    times - list, time of each call in nanoseconds (the function's own time when it returns one)
+"""
+
+
+def timeRuns(function, repeat):
+    times = []
+    for _ in range(repeat):
+        startTime = time.perf_counter_ns()
+        executionTime = function()
+        endTime = time.perf_counter_ns()
+        times.append(int(executionTime * 1e9) if executionTime is not None else endTime - startTime)
+    return times
+
+
+"""
+Run a trace on a fresh DynamicAllocation, skipping frees of processes that could not be allocated
+
+Args:
+    blocks - list, memory block sizes
+    events - list, allocate/free events
+    algName - str, algorithm name
+    allocatorClass - class, DynamicAllocation or a subclass taking (blocks, algName), e.g. CompactingAllocation
+
+Returns:
+    memoryAllocator - DynamicAllocation, state after the trace
+"""
+
+
+def runChurn(blocks, events, algName, allocatorClass=DynamicAllocation):
+    memoryAllocator = allocatorClass(blocks, algName)
+    for event in events:
+        if event[0] == "allocate":
+            memoryAllocator.allocate(event[1], event[2])
+        elif memoryAllocator.processBlocks[event[1]] != -1:
+            memoryAllocator.free(event[1])
+    return memoryAllocator
+
+
+"""
+Run the benchmarks
+
+Args:
+    distributions - list, size distributions to generate workloads from
+    blockCounts - list, numbers of memory blocks, each workload has as many processes as blocks
+    engines - list, engines to time, from engineNames
+    repeat - int, number of timed runs per algorithm
+    seed - int, random seed
+    maxScanWork - int, skip the scan engine when blocks * processes is larger than this (it is O(blocks * processes))
+    batchSize - int, number of scenarios in each batch engine run
+
+Yields:
+    record - dictionary, one benchmark result
+"""
+
+
+def runBenchmarks(distributions=distributions, blockCounts=(10, 100, 1000, 10000), engines=("scan", "indexed", "dynamic"),
+                  repeat=3, seed=0, maxScanWork=10 ** 8, batchSize=100):
+    for distribution in distributions:
+        for blockCount in blockCounts:
+            blocks, processes = generateWorkload(distribution, blockCount, blockCount, seed)
+            for engine in engines:
+                if engine in ("scan", "indexed"):
+                    if engine == "scan" and blockCount * blockCount > maxScanWork:
+                        continue
+                    for algName, methodName in MemoryAllocation.engines[engine].items():
+                        last = {}
+
+                        def run():
+                            last["allocator"] = MemoryAllocation(blocks)
+                            return getattr(last["allocator"], methodName)(processes)
+
+                        times = timeRuns(run, repeat)
+                        yield makeRecord(distribution, blockCount, blockCount, engine, algName, times, seed,
+                                         last["allocator"].metrics(), blocksScanned=last["allocator"].blocksScanned)
+                elif engine == "batch":
+                    import batchallocation
+                    scenarios = [generateWorkload(distribution, blockCount, blockCount, seed + i) for i in range(batchSize)]
+                    batchBlocks = batchallocation.padRows([scenario[0] for scenario in scenarios])
+                    batchProcesses = batchallocation.padRows([scenario[1] for scenario in scenarios])
+                    for algName in batchallocation.batchAlgorithms:
+                        times = timeRuns(lambda: batchallocation.batchAllocation(batchBlocks, batchProcesses, algName)[2], repeat)
+                        # report time per scenario so it compares with the other engines
+                        times = [t // batchSize for t in times]
+                        yield makeRecord(distribution, blockCount, blockCount, engine, algName, times, seed, None,
+                                         batchSize=batchSize)
+                elif engine == "dynamic":
+                    churnBlocks, events = generateChurn(distribution, blockCount, 4 * blockCount, seed=seed)
+                    for algName in DynamicAllocation.algorithms:
+                        last = {}
+
+                        def run():
+                            last["allocator"] = runChurn(churnBlocks, events, algName)
+
+                        times = timeRuns(run, repeat)
+                        yield makeRecord(distribution, blockCount, len(events), engine, algName, times, seed,
+                                         last["allocator"].metrics(),
+                                         failedAllocations=last["allocator"].failedAllocations)
+                elif engine == "adaptive":
+                    churnBlocks, events = generateChurn(distribution, blockCount, 4 * blockCount, seed=seed)
+                    last = {}
+
+                    def run():
+                        # frees of processes that could not be allocated still go to the shadows
+                        last["allocator"] = AdaptiveAllocation(churnBlocks)
+                        return last["allocator"].run(events, sampleEvery=len(events))[1]
+
+                    times = timeRuns(run, repeat)
+                    allocator = last["allocator"]
+                    # the final algorithm is reported separately so records of every run compare by key
+                    yield makeRecord(distribution, blockCount, len(events), engine, "adaptive", times, seed,
+                                     allocator.metrics(), finalAlgorithm=allocator.algName,
+                                     failedAllocations=allocator.failedAllocations,
+                                     tuningShare=allocator.tuningTimeNs / allocator.executionTimeNs,
+                                     policySwitches=len(allocator.policyHistory) - 1)
+                elif engine == "compacting":
+                    churnBlocks, events = generateChurn(distribution, blockCount, 4 * blockCount, seed=seed)
+                    for algName in DynamicAllocation.fitAlgorithms:
+                        last = {}
+
+                        def run():
+                            last["allocator"] = runChurn(churnBlocks, events, algName, CompactingAllocation)
+
+                        times = timeRuns(run, repeat)
+                        allocator = last["allocator"]
+                        yield makeRecord(distribution, blockCount, len(events), engine, algName, times, seed,
+                                         allocator.metrics(), failedAllocations=allocator.failedAllocations,
+                                         compactions=allocator.compactions, bytesMoved=allocator.bytesMoved,
+                                         processesMoved=allocator.processesMoved,
+                                         compactionTimeNs=allocator.compactionTimeNs,
+                                         recoveredAllocations=allocator.recoveredAllocations)
+                else:
+                    raise ValueError(f"unknown engine {engine!r}, expected one of {engineNames}")
+
+
+"""
+Build one benchmark result record
+
+Args:
+    distribution, blockCount, processCount, engine, algName, seed - workload and algorithm that was timed
+    times - list, times of each run in nanoseconds
+    metrics - tuple, MemoryAllocation.metrics() after the last run, None if not available
+    extra - additional fields for the record
+
+Returns:
+    record - dictionary
+"""
+
+
+def makeRecord(distribution, blockCount, processCount, engine, algName, times, seed, metrics, **extra):
+    record = {"distribution": distribution, "blocks": blockCount, "processes": processCount, "engine": engine,
+              "algorithm": algName, "seed": seed, "repeat": len(times), "bestNs": min(times),
+              "medianNs": int(statistics.median(times)), "python": platform.python_version()}
+    if metrics is not None:
+        record.update(zip(["totalMem", "allocatedMem", "internalFragmentation", "externalFragmentation"], metrics))
+    record.update(extra)
+    return record
+
+
+"""
+Key identifying the same benchmark in two result files
+
+Args:
+    record - dictionary, benchmark result
+
+Returns:
+    key - tuple
+"""
+
+
+def recordKey(record):
+    return record["distribution"], record["blocks"], record["processes"], record["engine"], record["algorithm"]
+
+
+"""
+Compare two sets of benchmark results to catch regressions
+
+Args:
+    baseline - list, benchmark records from an earlier commit
+    current - list, benchmark records to check
+    tolerance - float, allowed relative growth of median time
+
+Returns:
+    regressions - list, (current record, relative change) for every benchmark slower than tolerance allows
+"""
+
+
+def compareResults(baseline, current, tolerance=0.1):
+    baselineRecords = {recordKey(record): record for record in baseline}
+    regressions = []
+    for record in current:
+        old = baselineRecords.get(recordKey(record))
+        if old is None or old["medianNs"] == 0:
+            continue
+        change = record["medianNs"] / old["medianNs"] - 1
+        if change > tolerance:
+            regressions.append((record, change))
+    return regressions
+
+
+"""
+Read benchmark records from a JSON lines file
+
+Args:
+    path - str, path to results file
+
+Returns:
+    records - list, benchmark records
+"""
+
+
+def readResults(path):
+    with open(path) as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the memory allocation algorithms.")
+    parser.add_argument("--distributions", nargs="+", default=distributions, choices=distributions)
+    parser.add_argument("--blocks", nargs="+", type=int, default=[10, 100, 1000, 10000],
+                        help="block counts to benchmark, e.g. 10 100 1000 10000 100000 1000000")
+    parser.add_argument("--engines", nargs="+", default=["scan", "indexed", "dynamic"], choices=engineNames)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-scan-work", type=int, default=10 ** 8,
+                        help="skip the scan engine when blocks * processes is larger than this")
+    parser.add_argument("--output", help="JSON lines file to write results to (default: stdout)")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON lines results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="allowed relative slowdown when comparing")
+    args = parser.parse_args()
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    records = []
+    for record in runBenchmarks(args.distributions, args.blocks, args.engines, args.repeat, args.seed,
+                                args.max_scan_work):
+        records.append(record)
+        out.write(json.dumps(record) + "\n")
+        out.flush()
+    if args.output:
+        out.close()
+
+    if args.compare:
+        regressions = compareResults(readResults(args.compare), records, args.tolerance)
+        for record, change in regressions:
+            print(f"REGRESSION {record['engine']} {record['algorithm']} {record['distribution']} "
+                  f"blocks={record['blocks']}: {change:+.1%}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,741 @@
+import bisect
+import heapq
+import random
+from array import array
+
+from sortedcontainers import SortedList
+
+"""
+Index structures used by the indexed allocation engine in memallocation.py
+
+Classes:
+    SizeIndex - free memory blocks ordered by remaining size, answers best fit & worst fit queries in O(log n)
+    SegmentTree - max segment tree over remaining block sizes in block order, answers first fit & next fit queries in O(log n)
+    AddressIndex - free holes ordered by start address, answers first fit & neighbouring hole queries in O(log n) as holes
+                   are split and merged
+    BuddyHeap - power of two chunks of memory blocks with per order free lists and a bitmask of the non empty orders,
+                allocates with buddy splitting and frees with buddy merging in O(log n)
+    SizeClasses - memory blocks grouped into power of two size classes, finds a block that fits a process in O(1)
+"""
+
+
+class SizeIndex:
+    """
+    Initialize SizeIndex with the remaining size of each memory block, entries are kept as (size, position) pairs
+    so blocks of equal size are ordered by their position in the block list
+
+    Args:
+        sizes - iterable, remaining size of each memory block, in block order
+    """
+
+    def __init__(self, sizes):
+        self.sizes = array('q', sizes)
+        self.entries = SortedList((size, position) for position, size in enumerate(self.sizes))
+
+    """
+    Find the smallest block that can hold a process (Best Fit)
+
+    Args:
+        size - int, process size
+
+    Returns:
+        position - int, position of smallest block with remaining size >= size (first such block on ties), None if no block fits
+    """
+
+    def smallestFit(self, size):
+        i = self.entries.bisect_left((size, -1))
+        if i == len(self.entries):
+            return None
+        return self.entries[i][1]
+
+    """
+    Find the largest block, if it can hold a process (Worst Fit)
+
+    Args:
+        size - int, process size
+
+    Returns:
+        position - int, position of largest block (first such block on ties), None if the largest block is smaller than size
+    """
+
+    def largestFit(self, size):
+        if not self.entries:
+            return None
+        largestSize = self.entries[-1][0]
+        if largestSize < size:
+            return None
+        return self.entries[self.entries.bisect_left((largestSize, -1))][1]
+
+    """
+    Update the index in place after memory is taken from a block
+
+    Args:
+        position - int, position of block in the block list
+        amount - int, memory taken from the block
+    """
+
+    def shrink(self, position, amount):
+        oldSize = self.sizes[position]
+        self.entries.remove((oldSize, position))
+        self.sizes[position] = oldSize - amount
+        self.entries.add((oldSize - amount, position))
+
+
+class SegmentTree:
+    """
+    Initialize SegmentTree with the remaining size of each memory block. The tree is stored in a flat array, node i has
+    children 2i and 2i + 1 and holds the largest remaining size below it, leaves start at self.leaves
+
+    Args:
+        sizes - iterable, remaining size of each memory block, in block order
+    """
+
+    def __init__(self, sizes):
+        sizes = array('q', sizes)
+        self.n = len(sizes)
+        self.leaves = 1
+        while self.leaves < self.n:
+            self.leaves *= 2
+        # padding leaves hold -1 so they never fit a process
+        self.tree = array('q', [-1]) * (2 * self.leaves)
+        self.tree[self.leaves:self.leaves + self.n] = sizes
+        for i in range(self.leaves - 1, 0, -1):
+            self.tree[i] = max(self.tree[2 * i], self.tree[2 * i + 1])
+
+    """
+    Find the first block at or after a position that can hold a process
+
+    Args:
+        start - int, position to start searching from
+        size - int, process size
+
+    Returns:
+        position - int, position of first block from start with remaining size >= size, None if no block fits
+    """
+
+    def firstFit(self, start, size):
+        if start >= self.n:
+            return None
+        i = start + self.leaves
+        # climb until reaching a subtree, to the right of start, that holds a large enough block
+        while self.tree[i] < size:
+            # move up while i is a right child, then over to the next subtree
+            while i & 1:
+                i >>= 1
+            if i == 0:
+                return None
+            i += 1
+        # descend to the leftmost large enough leaf
+        while i < self.leaves:
+            i *= 2
+            if self.tree[i] < size:
+                i += 1
+        return i - self.leaves
+
+    """
+    Update the tree in place after memory is taken from a block
+
+    Args:
+        position - int, position of block in the block list
+        amount - int, memory taken from the block
+    """
+
+    def shrink(self, position, amount):
+        i = position + self.leaves
+        self.tree[i] -= amount
+        i >>= 1
+        while i:
+            self.tree[i] = max(self.tree[2 * i], self.tree[2 * i + 1])
+            i >>= 1
+
+
+class AddressIndex:
+    """
+    Initialize an AddressIndex, the free holes of memory ordered by start address. Holes are kept in a treap
+    (binary search tree on start address, heap on a random priority) where every node also holds the largest hole
+    size below it, so first fit from any address, inserts, removals and neighbour lookups are O(log n) expected
+
+    Args:
+        holes - list, (start, size) of each hole in address order to start with, built in O(n), None starts empty
+    """
+
+    def __init__(self, holes=None):
+        self.root = None
+        self.count = 0
+        if holes:
+            self.root = buildHoles(holes)
+            self.count = len(holes)
+
+    """
+    Copy the index, so a copy of an allocator can split and merge holes on its own
+
+    Returns:
+        index - AddressIndex, holding the same holes
+    """
+
+    def copy(self):
+        return AddressIndex(self.holes())
+
+    """
+    Add a hole
+
+    Args:
+        start - int, start address of hole
+        size - int, size of hole
+    """
+
+    def insert(self, start, size):
+        left, right = splitHoles(self.root, start)
+        self.root = mergeHoles(mergeHoles(left, HoleNode(start, size)), right)
+        self.count += 1
+
+    """
+    Remove the hole starting at an address
+
+    Args:
+        start - int, start address of hole
+    """
+
+    def remove(self, start):
+        left, right = splitHoles(self.root, start)
+        middle, right = splitHoles(right, start + 1)
+        if middle is not None:
+            self.count -= 1
+        self.root = mergeHoles(left, right)
+
+    """
+    Find the first hole at or after an address that can hold a process
+
+    Args:
+        fromAddress - int, address to start searching from
+        size - int, process size
+
+    Returns:
+        (start, size) - tuple, first hole starting at or after fromAddress with size >= size, None if no hole fits
+    """
+
+    def firstFit(self, fromAddress, size):
+        return firstFitHole(self.root, fromAddress, size)
+
+    """
+    Find the hole just before an address
+
+    Args:
+        address - int, address to look before
+
+    Returns:
+        (start, size) - tuple, hole with the largest start address < address, None if there is none
+    """
+
+    def before(self, address):
+        node = self.root
+        found = None
+        while node is not None:
+            if node.start < address:
+                found = node
+                node = node.right
+            else:
+                node = node.left
+        return None if found is None else (found.start, found.size)
+
+    """
+    Find the hole just after an address
+
+    Args:
+        address - int, address to look after
+
+    Returns:
+        (start, size) - tuple, hole with the smallest start address > address, None if there is none
+    """
+
+    def after(self, address):
+        node = self.root
+        found = None
+        while node is not None:
+            if node.start > address:
+                found = node
+                node = node.left
+            else:
+                node = node.right
+        return None if found is None else (found.start, found.size)
+
+    """
+    List every hole in address order
+
+    Returns:
+        holes - list, (start, size) of each hole
+    """
+
+    def holes(self):
+        holes = []
+        stack = []
+        node = self.root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            holes.append((node.start, node.size))
+            node = node.right
+        return holes
+
+
+class HoleNode:
+    """
+    Initialize a treap node for one hole of an AddressIndex
+
+    Args:
+        start - int, start address of hole
+        size - int, size of hole
+    """
+
+    __slots__ = ("start", "size", "maxSize", "priority", "left", "right")
+
+    def __init__(self, start, size):
+        self.start = start
+        self.size = size
+        self.maxSize = size
+        self.priority = random.random()
+        self.left = None
+        self.right = None
+
+    """
+    Recalculate largest hole size below this node after its children change
+    """
+
+    def update(self):
+        self.maxSize = self.size
+        if self.left is not None and self.left.maxSize > self.maxSize:
+            self.maxSize = self.left.maxSize
+        if self.right is not None and self.right.maxSize > self.maxSize:
+            self.maxSize = self.right.maxSize
+
+
+"""
+Build a treap from holes already in address order in O(n), keeping a stack of the rightmost path of the tree
+
+Args:
+    holes - list, (start, size) of each hole in address order
+
+Returns:
+    root - HoleNode, root of treap
+"""
+
+
+def buildHoles(holes):
+    stack = []
+    for start, size in holes:
+        node = HoleNode(start, size)
+        last = None
+        # nodes of lower priority on the rightmost path become this node's left subtree
+        while stack and stack[-1].priority < node.priority:
+            last = stack.pop()
+        node.left = last
+        if stack:
+            stack[-1].right = node
+        stack.append(node)
+    if not stack:
+        return None
+    root = stack[0]
+    # recalculate largest hole sizes bottom up (children before parents)
+    order = []
+    pending = [root]
+    while pending:
+        node = pending.pop()
+        order.append(node)
+        if node.left is not None:
+            pending.append(node.left)
+        if node.right is not None:
+            pending.append(node.right)
+    for node in reversed(order):
+        node.update()
+    return root
+
+
+"""
+Split a treap of holes by start address
+
+Args:
+    node - HoleNode, root of treap
+    start - int, address to split at
+
+Returns:
+    left, right - HoleNode, treaps of holes starting before start and at or after start
+"""
+
+
+def splitHoles(node, start):
+    if node is None:
+        return None, None
+    if node.start < start:
+        node.right, right = splitHoles(node.right, start)
+        node.update()
+        return node, right
+    left, node.left = splitHoles(node.left, start)
+    node.update()
+    return left, node
+
+
+"""
+First fit search in a treap of holes, subtrees whose largest hole is too small are skipped
+
+Args:
+    node - HoleNode, root of treap
+    fromAddress - int, address to start searching from
+    size - int, process size
+
+Returns:
+    (start, size) - tuple, first hole starting at or after fromAddress with size >= size, None if no hole fits
+"""
+
+
+def firstFitHole(node, fromAddress, size):
+    if node is None or node.maxSize < size:
+        return None
+    if node.start >= fromAddress:
+        result = firstFitHole(node.left, fromAddress, size)
+        if result is not None:
+            return result
+        if node.size >= size:
+            return node.start, node.size
+    return firstFitHole(node.right, fromAddress, size)
+
+
+"""
+Merge two treaps of holes, every hole in left starts before every hole in right
+
+Args:
+    left - HoleNode, root of left treap
+    right - HoleNode, root of right treap
+
+Returns:
+    root - HoleNode, root of merged treap
+"""
+
+
+def mergeHoles(left, right):
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = mergeHoles(left.right, right)
+        left.update()
+        return left
+    right.left = mergeHoles(left, right.left)
+    right.update()
+    return right
+
+
+class BuddyHeap:
+    """
+    Initialize BuddyHeap over memory blocks for binary buddy allocation. Blocks are laid out one after another in one
+    address space and free memory is split into power of two chunks aligned within their block (a whole block is its
+    binary decomposition, largest first) so no memory is lost to the heap. Free chunks are kept in one free list per
+    order (a heap of addresses, lowest address first) and a bitmask records which orders have a free chunk, so
+    allocating finds the order to split with bit operations and takes O(log n) splits.
+
+    With merging, freed chunks are merged with their buddy (the other half of the chunk they were split from) for as
+    long as the buddy is free, in O(log n). The free chunks are then also kept in freeChunks so a buddy is looked up in
+    O(1); chunks merged away are left in their free list and skipped when they come up, and a free list is rebuilt when
+    more than half of it is stale
+
+    Args:
+        sizes - iterable, size of each memory block, in block order
+        holes - iterable, (start, size) of the free memory in address order, None frees every block
+        merging - bool, keep what free() needs, one pass allocations that never free chunks leave it off
+    """
+
+    def __init__(self, sizes, holes=None, merging=False):
+        self.blockSizes = array('q', sizes)
+        self.blockStarts = array('q')
+        self.freeLists = []
+        # number of free chunks of each order, and a bitmask of the orders that have any
+        self.freeCounts = []
+        self.nonEmpty = 0
+        # order of every free chunk, by address
+        self.freeChunks = {} if merging else None
+        # number of bitmask lookups made by allocate
+        self.lookups = 0
+        start = 0
+        for size in self.blockSizes:
+            self.blockStarts.append(start)
+            if holes is None:
+                self.addFree(start, 0, size)
+            start += size
+        if holes is not None:
+            for start, size in holes:
+                self.addFree(start, start - self.blockStarts[self.blockOf(start)], size)
+        for freeList in self.freeLists:
+            heapq.heapify(freeList)
+
+    """
+    Split free memory into the largest chunks its alignment within the block allows and add them to the free lists
+
+    Args:
+        address - int, start address of free memory
+        offset - int, start of free memory from the start of its block
+        size - int, size of free memory
+    """
+
+    def addFree(self, address, offset, size):
+        while size > 0:
+            order = size.bit_length() - 1
+            if offset:
+                # a chunk starts at a multiple of its size
+                order = min(order, (offset & -offset).bit_length() - 1)
+            self.addChunk(address, order, push=False)
+            address += 1 << order
+            offset += 1 << order
+            size -= 1 << order
+
+    """
+    Mark a chunk as free
+
+    Args:
+        address - int, start address of chunk
+        order - int, chunk size is 2 ** order
+        push - bool, keep the free list a heap (False while building, it is heapified afterwards)
+    """
+
+    def addChunk(self, address, order, push=True):
+        while len(self.freeLists) <= order:
+            self.freeLists.append([])
+            self.freeCounts.append(0)
+        if push:
+            heapq.heappush(self.freeLists[order], address)
+        else:
+            self.freeLists[order].append(address)
+        if self.freeChunks is not None:
+            self.freeChunks[address] = order
+        self.freeCounts[order] += 1
+        self.nonEmpty |= 1 << order
+
+    """
+    Take the lowest addressed free chunk of an order off its free list
+
+    Args:
+        order - int, order with a free chunk
+
+    Returns:
+        address - int, start address of chunk
+    """
+
+    def takeChunk(self, order):
+        freeList = self.freeLists[order]
+        address = heapq.heappop(freeList)
+        if self.freeChunks is not None:
+            # skip chunks merged away since they were listed
+            while self.freeChunks.get(address) != order:
+                address = heapq.heappop(freeList)
+            del self.freeChunks[address]
+        self.countTaken(order)
+        return address
+
+    """
+    Take a free chunk out of the heap wherever it is in its free list, it is skipped when it comes up (merging only)
+
+    Args:
+        address - int, start address of chunk
+        order - int, chunk size is 2 ** order
+    """
+
+    def removeChunk(self, address, order):
+        del self.freeChunks[address]
+        self.countTaken(order)
+        freeList = self.freeLists[order]
+        # drop the stale addresses once they are more than half of the list, a sorted list is a heap
+        if len(freeList) > 2 * self.freeCounts[order] + 16:
+            freeList[:] = sorted(listed for listed in set(freeList) if self.freeChunks.get(listed) == order)
+
+    """
+    Count a chunk taken out of the heap, clearing its order from the bitmask when it was the last one
+
+    Args:
+        order - int, order of chunk
+    """
+
+    def countTaken(self, order):
+        self.freeCounts[order] -= 1
+        if not self.freeCounts[order]:
+            self.nonEmpty &= ~(1 << order)
+            self.freeLists[order].clear()
+
+    """
+    Find the block an address is in
+
+    Args:
+        address - int, address of memory
+
+    Returns:
+        blockID - int, position of block in the block list
+    """
+
+    def blockOf(self, address):
+        return bisect.bisect_right(self.blockStarts, address) - 1
+
+    """
+    List the free chunks
+
+    Returns:
+        chunks - list, (address, order) of every free chunk in address order
+    """
+
+    def chunks(self):
+        if self.freeChunks is not None:
+            return sorted(self.freeChunks.items())
+        return sorted((address, order) for order, freeList in enumerate(self.freeLists) for address in freeList)
+
+    """
+    Find the largest free chunk
+
+    Returns:
+        (address, order) - tuple, lowest addressed chunk of the highest order with a free chunk, None if none is free
+    """
+
+    def largestChunk(self):
+        if not self.nonEmpty:
+            return None
+        order = self.nonEmpty.bit_length() - 1
+        freeList = self.freeLists[order]
+        if self.freeChunks is not None:
+            while self.freeChunks.get(freeList[0]) != order:
+                heapq.heappop(freeList)
+        return freeList[0], order
+
+    """
+    Allocate the lowest addressed chunk of the smallest free order that holds a size, splitting larger chunks in half
+    until they are just big enough
+
+    Args:
+        size - int, process size
+
+    Returns:
+        (address, order, splitOrder) - tuple, start address and order of allocated chunk and order of the free chunk it
+                                       was split from (order if it was not split), None if no free chunk is large enough
+    """
+
+    def allocate(self, size):
+        # smallest order with 2 ** order >= size
+        order = max(size - 1, 0).bit_length()
+        # lowest order at or above it with a free chunk, from the bitmask
+        self.lookups += 1
+        mask = self.nonEmpty >> order
+        if not mask:
+            return None
+        freeOrder = order + (mask & -mask).bit_length() - 1
+        address = self.takeChunk(freeOrder)
+        splitOrder = freeOrder
+        # give back the upper half of the chunk until it is the right size
+        while freeOrder > order:
+            freeOrder -= 1
+            self.addChunk(address + (1 << freeOrder), freeOrder)
+        return address, order, splitOrder
+
+    """
+    Free an allocated chunk, merging it with its buddy for as long as the buddy is a free chunk of the same order
+    inside the same block (merging only)
+
+    Args:
+        address - int, start address of chunk
+        order - int, chunk size is 2 ** order
+
+    Returns:
+        (address, mergedOrder) - tuple, start address and order of the free chunk it ends up in, the buddies merged
+                                 into it are the chunks of orders order to mergedOrder - 1 next to it
+    """
+
+    def free(self, address, order):
+        blockID = self.blockOf(address)
+        blockStart = self.blockStarts[blockID]
+        blockEnd = blockStart + self.blockSizes[blockID]
+        while True:
+            buddy = blockStart + ((address - blockStart) ^ (1 << order))
+            # blocks are not powers of two, a buddy past the end of the block does not exist
+            if buddy + (1 << order) > blockEnd or self.freeChunks.get(buddy) != order:
+                break
+            self.removeChunk(buddy, order)
+            address = min(address, buddy)
+            order += 1
+        self.addChunk(address, order)
+        return address, order
+
+
+class SizeClasses:
+    """
+    Initialize SizeClasses with the remaining size of each memory block. Blocks are kept in segregated free lists, one
+    per power of two size class (class c holds blocks with 2 ** (c - 1) <= size < 2 ** c, class 0 the empty blocks),
+    and a bitmask records which classes are non empty so the first class that fits a size is found with bit operations
+
+    Args:
+        sizes - iterable, remaining size of each memory block, in block order
+    """
+
+    def __init__(self, sizes):
+        self.sizes = array('q', sizes)
+        self.classes = []
+        self.nonEmpty = 0
+        # number of size classes and blocks looked at by find
+        self.lookups = 0
+        for position, size in enumerate(self.sizes):
+            self.add(position, size.bit_length())
+
+    """
+    Add a block to a size class
+
+    Args:
+        position - int, position of block in the block list
+        sizeClass - int, size class of block
+    """
+
+    def add(self, position, sizeClass):
+        while len(self.classes) <= sizeClass:
+            self.classes.append({})
+        # dictionaries keep insertion order and remove in O(1)
+        self.classes[sizeClass][position] = None
+        self.nonEmpty |= 1 << sizeClass
+
+    """
+    Find a block that can hold a process. Blocks of the smallest class whose blocks all fit are taken first (oldest
+    entry of the class), only if there are none is the class of the size itself searched
+
+    Args:
+        size - int, process size
+
+    Returns:
+        position - int, position of a block with remaining size >= size, None if no block fits
+    """
+
+    def find(self, size):
+        self.lookups += 1
+        # every block of class fitClass or above is at least size
+        fitClass = (size - 1).bit_length() + 1 if size > 0 else 0
+        mask = self.nonEmpty >> fitClass
+        if mask:
+            sizeClass = fitClass + (mask & -mask).bit_length() - 1
+            return next(iter(self.classes[sizeClass]))
+        sizeClass = size.bit_length()
+        if sizeClass < fitClass and sizeClass < len(self.classes):
+            for position in self.classes[sizeClass]:
+                self.lookups += 1
+                if self.sizes[position] >= size:
+                    return position
+        return None
+
+    """
+    Update the classes after memory is taken from a block
+
+    Args:
+        position - int, position of block in the block list
+        amount - int, memory taken from the block
+    """
+
+    def shrink(self, position, amount):
+        oldClass = self.sizes[position].bit_length()
+        self.sizes[position] -= amount
+        newClass = self.sizes[position].bit_length()
+        if newClass != oldClass:
+            del self.classes[oldClass][position]
+            if not self.classes[oldClass]:
+                self.nonEmpty &= ~(1 << oldClass)
+            self.add(position, newClass)
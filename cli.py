@@ -0,0 +1,286 @@
+import argparse
+import contextlib
+import csv
+import glob
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import service
+from memallocation import MemoryAllocation, determinants, rankResults
+from resultcache import simulate
+from scenariostore import ScenarioStore, attachStore
+from tracereader import parseSizes
+
+"""
+Command line for the memory allocation algorithms, without the GUI
+
+Gives the same output as the GUI: the metrics of every algorithm and the best one for a determinant, and with
+--algorithm the allocations of one algorithm and optionally its diagram. gradio is never imported and matplotlib only
+when a diagram is drawn.
+
+    python cli.py --blocks 50,150,300,350,600 --processes 300,25,125,50 --determinant externalFragmentation
+    python cli.py --blocks 50,150,300,350,600 --processes 300,25,125,50 --algorithm "best fit" --diagram out.png
+
+Given workload files, directories or glob patterns instead, every scenario in them is compared in a pool of worker
+processes and one row per scenario and algorithm is streamed to a CSV (or JSON lines) file as results come in, with
+the determinants each algorithm is best for, its place in the weighted ranking and whether it is on the Pareto front:
+
+    python cli.py workloads/ "sweeps/**/*.jsonl" --output results.csv --workers 8
+
+Workload files hold one or more scenarios:
+    .json - {"blocks": [...], "processes": [...]} or a list of them
+    .jsonl - one {"blocks": [...], "processes": [...]} per line
+    anything else - pairs of lines, memory block sizes then process sizes, separated by commas
+
+Functions:
+    workloadPaths(patterns) - expands files, directories and glob patterns into a sorted list of workload files
+    workloadSizes(workload, location) - returns the block and process sizes of a JSON scenario, checking them
+    readWorkloads(path) - yields (scenario number, blocks, processes) of each scenario in a workload file
+    compareScenario(path, scenario, blocks, processes, engine) - runs every algorithm, returns one row per algorithm
+    compareStoredScenario(path, scenario, storeName, scenarioIndex, engine) - compareScenario on a ScenarioStore scenario
+    bulkRows(paths, engine, workers, batchSize) - yields the rows of every scenario in the workload files
+"""
+
+workloadExtensions = (".json", ".jsonl", ".txt", ".csv")
+resultFields = ["workload", "scenario", "blocks", "processes", "algorithm", "totalMem", "allocatedMem",
+                "internalFragmentation", "externalFragmentation", "executionTime", "blocksScanned",
+                "blocksScannedPerRequest", "roundingWaste", "largestHole", "holeCount", "bestFor", "weightedRank",
+                "pareto"]
+
+"""
+Expand workload arguments into files
+
+Args:
+    patterns - list, workload files, directories (searched recursively for workloadExtensions files) or glob patterns
+
+Returns:
+    paths - list, sorted workload file paths, without duplicates
+"""
+
+
+def workloadPaths(patterns):
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = [path for path in glob.glob(os.path.join(pattern, "**", "*"), recursive=True)
+                       if path.endswith(workloadExtensions) and os.path.isfile(path)]
+        else:
+            matches = [path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path)]
+        if not matches:
+            raise ValueError(f"no workload files match {pattern!r}")
+        paths.update(matches)
+    return sorted(paths)
+
+
+"""
+Check a scenario read from a JSON workload
+
+Args:
+    workload - dictionary, {"blocks": [...], "processes": [...]} as read from the file
+    location - str, where the scenario is in its file, used in error messages
+
+Returns:
+    blocks, processes - lists, memory block sizes and process sizes
+"""
+
+
+def workloadSizes(workload, location):
+    if not isinstance(workload, dict):
+        raise ValueError(f"{location}: expected {{\"blocks\": [...], \"processes\": [...]}}")
+    sizes = []
+    for field in ("blocks", "processes"):
+        if field not in workload:
+            raise ValueError(f"{location}: workload is missing {field!r}")
+        values = workload[field]
+        # bool is an int subclass, true/false are not sizes
+        if not isinstance(values, list) or not all(type(value) is int and value >= 0 for value in values):
+            raise ValueError(f"{location}: {field} must be a list of whole numbers of 0 or more")
+        sizes.append(values)
+    return sizes
+
+
+"""
+Read the scenarios in a workload file
+
+Args:
+    path - str, path to workload file
+
+Yields:
+    scenario - tuple, (scenario number within the file, memory block sizes, process sizes)
+"""
+
+
+def readWorkloads(path):
+    with open(path) as file:
+        if path.endswith(".json"):
+            try:
+                workloads = json.load(file)
+            except ValueError as error:
+                raise ValueError(f"{path}: {error}")
+            if isinstance(workloads, dict):
+                workloads = [workloads]
+            for scenario, workload in enumerate(workloads):
+                yield (scenario, *workloadSizes(workload, f"{path} scenario {scenario}"))
+        elif path.endswith(".jsonl"):
+            lines = ((lineNumber, line) for lineNumber, line in enumerate(file, 1) if line.strip())
+            for scenario, (lineNumber, line) in enumerate(lines):
+                try:
+                    workload = json.loads(line)
+                except ValueError as error:
+                    raise ValueError(f"{path}:{lineNumber}: {error}")
+                yield (scenario, *workloadSizes(workload, f"{path}:{lineNumber}"))
+        else:
+            lines = ((lineNumber, line) for lineNumber, line in enumerate(file, 1) if line.strip())
+            for scenario, ((blocksNumber, blocksLine), (processesNumber, processesLine)) in enumerate(zip(lines, lines)):
+                try:
+                    blocks = parseSizes(blocksLine)
+                except ValueError as error:
+                    raise ValueError(f"{path}:{blocksNumber}: {error}")
+                try:
+                    processes = parseSizes(processesLine)
+                except ValueError as error:
+                    raise ValueError(f"{path}:{processesNumber}: {error}")
+                yield scenario, blocks, processes
+
+
+"""
+Run every algorithm on one scenario and find the best algorithm for each determinant
+
+Args:
+    path - str, workload file the scenario came from
+    scenario - int, scenario number within the file
+    blocks - list, memory block sizes
+    processes - list, process sizes
+    engine - str, key of MemoryAllocation.engines
+
+Returns:
+    rows - list, one dictionary of resultFields per algorithm
+"""
+
+
+def compareScenario(path, scenario, blocks, processes, engine="scan"):
+    ranking = MemoryAllocation(blocks).rankAlgorithms(blocks, processes, engine=engine)
+    results = ranking["results"]
+    bestFor = {algName: [] for algName in results}
+    for determinant, ranked in ranking["rankings"].items():
+        bestFor[ranked[0]].append(determinant)
+    weightedRanks = {algName: rank for rank, (algName, score) in enumerate(ranking["weighted"], 1)}
+    rows = []
+    for algName, metrics in results.items():
+        row = {"workload": path, "scenario": scenario, "blocks": len(blocks), "processes": len(processes),
+               "algorithm": algName}
+        row.update((field, metrics[field]) for field in resultFields if field in metrics)
+        row["bestFor"] = " ".join(bestFor[algName])
+        row["weightedRank"] = weightedRanks[algName]
+        row["pareto"] = algName in ranking["pareto"]
+        rows.append(row)
+    return rows
+
+
+"""
+compareScenario on a scenario read from a ScenarioStore, in a worker process
+
+Args:
+    path, scenario, engine - as in compareScenario
+    storeName - str, name of the ScenarioStore
+    scenarioIndex - int, scenario number in the store
+
+Returns:
+    rows - list, one dictionary of resultFields per algorithm
+"""
+
+
+def compareStoredScenario(path, scenario, storeName, scenarioIndex, engine="scan"):
+    blocks, processes = attachStore(storeName).scenario(scenarioIndex)
+    return compareScenario(path, scenario, blocks, processes, engine)
+
+
+"""
+Compare every scenario in the workload files
+
+Scenarios are read lazily and sent to the worker pool batchSize at a time, so any number of scenarios can be swept
+without holding them all in memory, and rows come out in file and scenario order. Each batch is put in a
+ScenarioStore, workers read the sizes from shared memory instead of receiving pickled copies.
+
+Args:
+    paths - list, workload file paths
+    engine - str, key of MemoryAllocation.engines
+    workers - int, number of worker processes, None runs every scenario in this process
+    batchSize - int, number of scenarios sent to the pool at a time
+
+Yields:
+    row - dictionary of resultFields, one per scenario and algorithm
+"""
+
+
+def bulkRows(paths, engine="scan", workers=None, batchSize=256):
+    scenarios = ((path, scenario, blocks, processes, engine) for path in paths
+                 for scenario, blocks, processes in readWorkloads(path))
+    if workers is None:
+        for task in scenarios:
+            yield from compareScenario(*task)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while True:
+            batch = list(itertools.islice(scenarios, batchSize))
+            if not batch:
+                break
+            with ScenarioStore([(blocks, processes) for path, scenario, blocks, processes, engine in batch]) as store:
+                tasks = [(path, scenario, store.name, scenarioIndex, engine)
+                         for scenarioIndex, (path, scenario, blocks, processes, engine) in enumerate(batch)]
+                chunksize = max(1, len(tasks) // (4 * workers))
+                for rows in executor.map(compareStoredScenario, *zip(*tasks), chunksize=chunksize):
+                    yield from rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Determine the best memory allocation algorithm.")
+    parser.add_argument("workloads", nargs="*",
+                        help="workload files, directories or glob patterns to compare in bulk")
+    parser.add_argument("--blocks", help="memory block sizes separated by commas")
+    parser.add_argument("--processes", help="process sizes separated by commas")
+    parser.add_argument("--determinant", default="externalFragmentation", choices=determinants)
+    parser.add_argument("--algorithm", help="also show the allocations of this algorithm, e.g. \"first fit\"")
+    parser.add_argument("--diagram", metavar="PNG", help="write the diagram of --algorithm to this file")
+    parser.add_argument("--engine", default="scan", choices=list(MemoryAllocation.engines),
+                        help="allocation methods used in bulk mode")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="worker processes in bulk mode, 0 runs every scenario in this process")
+    parser.add_argument("--format", default="csv", choices=["csv", "jsonl"], help="bulk output format")
+    parser.add_argument("--output", help="file to write bulk results to (default: stdout)")
+    args = parser.parse_args()
+    if not args.workloads and (args.blocks is None or args.processes is None):
+        parser.error("give --blocks and --processes, or workload files to compare in bulk")
+    if args.diagram and not args.algorithm:
+        parser.error("--diagram needs --algorithm")
+
+    try:
+        if args.workloads:
+            paths = workloadPaths(args.workloads)
+            # the output file is closed even if a workload fails part way
+            with open(args.output, "w", newline="") if args.output else contextlib.nullcontext(sys.stdout) as out:
+                if args.format == "csv":
+                    writer = csv.DictWriter(out, fieldnames=resultFields)
+                    writer.writeheader()
+                for row in bulkRows(paths, args.engine, args.workers or None):
+                    if args.format == "csv":
+                        writer.writerow(row)
+                    else:
+                        out.write(json.dumps(row) + "\n")
+        else:
+            blocks = service.checkedSizes(args.blocks, "memory block sizes")
+            processes = service.checkedSizes(args.processes, "process sizes")
+            results = service.summarizeAlgorithms(blocks, processes)
+            ranking = rankResults(results)
+            print(service.formatMetrics(ranking["rankings"][args.determinant][0], results))
+            print(service.formatRankings(ranking))
+            if args.algorithm:
+                print(service.formatAllocations(simulate(blocks, processes, args.algorithm)))
+            if args.diagram:
+                with open(args.diagram, "wb") as file:
+                    file.write(service.diagramPng(blocks, processes, args.algorithm))
+    except ValueError as error:
+        sys.exit(f"error: {error}")
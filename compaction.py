@@ -0,0 +1,299 @@
+import time
+
+from sortedcontainers import SortedList
+
+from dynamicallocation import DynamicAllocation
+
+"""
+Class CompactingAllocation
+DynamicAllocation that compacts memory, moving live processes so the holes between them merge
+
+Compacting a block slides its processes down to the start of the block in address order, leaving one hole at its end.
+Processes before the block's first hole are already in place and are not moved, so compacting a block moves exactly
+its allocated memory after the first hole, which compactionCost(blockID) reads from the holes in O(log n). The
+processes of each block are kept in blockMembers, so compacting a block takes time in the number of processes it
+holds, not the number of processes ever allocated, and the blocks are kept ordered by free memory in blockFreeSizes, so
+choosing a block to compact only looks at the blocks with room for the process.
+
+Compaction is triggered:
+    on failure (onFailure) - an allocation that finds no hole large enough compacts the one block with enough free memory
+                             that moves the fewest bytes, then tries again; the allocation only fails if no block has
+                             enough free memory in total
+    by threshold (holeThreshold) - when a free leaves more than holeThreshold holes per block, every fragmented block
+                                   is compacted
+
+Moving memory is not free, so every compaction is accounted for: bytesMoved, processesMoved and compactionTimeNs
+against recoveredAllocations (allocations that only succeeded because of compaction) and failedAllocations, to weigh
+the cost of compaction against the failures each algorithm has without it. compactionTimeNs includes choosing the
+block to compact.
+
+Attributes (in addition to DynamicAllocation's):
+    onFailure - bool, compact when an allocation fails
+    holeThreshold - float, compact every fragmented block when there are more holes per block than this, None never
+    compactions - int, number of compactions
+    bytesMoved - int, memory moved by compactions
+    processesMoved - int, processes moved by compactions
+    compactionTimeNs - int, time spent choosing blocks to compact and compacting them, in nanoseconds
+    recoveredAllocations - int, allocations that succeeded after a compaction
+    blockMembers - list, set of the processes allocated to each block
+    blockFreeSizes - SortedList, (free memory, block number) of every block
+
+Methods:
+    resetProcesses(processesArr), placeProcess(...), releaseProcess(processID) - as in MemoryAllocation, also keeping
+                                                                                 blockMembers and blockFreeSizes up to date
+    fork() - returns an independent copy of the allocator, blockMembers and blockFreeSizes included
+    resizeFree(blockID, blockFree) - moves a block in blockFreeSizes after its free memory changed
+    allocate(processID, processSize) - DynamicAllocation.allocate, compacting and trying again if it fails (onFailure)
+    free(processID) - DynamicAllocation.free, compacting if there are too many holes (holeThreshold)
+    compactionCost(blockID) - returns the memory compacting a block would move
+    cheapestBlock(processSize) - returns the block with room for a process that is cheapest to compact
+    fragmentedBlocks() - returns the blocks whose free memory is not one hole at the end of the block
+    compact(blockIDs) - compacts blocks, returns the memory moved
+"""
+
+
+class CompactingAllocation(DynamicAllocation):
+    """
+    Initialize CompactingAllocation with free memory blocks and when to compact
+
+    Args:
+        blocks - list, array of memory block sizes
+        algName - str, algorithm used to place processes, one of DynamicAllocation.fitAlgorithms (buddy chunks have to
+                  stay aligned, so they can not be slid down)
+        onFailure - bool, compact when an allocation finds no hole large enough
+        holeThreshold - float, compact every fragmented block when holeCount is more than holeThreshold per block
+                        (at least 1, compacted blocks have one hole each), None turns threshold compaction off
+        checkMetrics - bool, check the running totals against a full recalculation every time metrics() is called
+    """
+
+    def __init__(self, blocks, algName="first fit", onFailure=True, holeThreshold=None, checkMetrics=False):
+        if algName not in self.fitAlgorithms:
+            raise ValueError(f"cannot compact with {algName!r}, expected one of {self.fitAlgorithms}")
+        super().__init__(blocks, algName, checkMetrics)
+        if holeThreshold is not None and holeThreshold < 1:
+            raise ValueError(f"holeThreshold must be at least 1, got {holeThreshold}")
+        self.onFailure = onFailure
+        self.holeThreshold = holeThreshold
+        self.compactions = 0
+        self.bytesMoved = 0
+        self.processesMoved = 0
+        self.compactionTimeNs = 0
+        self.recoveredAllocations = 0
+
+    """
+    Reset allocation state for a new list of processes, every block holds no processes and is all free
+
+    Args:
+        processesArr - list, array of process sizes
+    """
+
+    def resetProcesses(self, processesArr):
+        super().resetProcesses(processesArr)
+        self.blockMembers = [set() for _ in range(len(self.blockCapacity))]
+        self.blockFreeSizes = SortedList((blockFree, blockID) for blockID, blockFree in enumerate(self.freeBlocks))
+
+    """
+    Allocate a process to a block, recording it as one of the block's processes
+
+    Args:
+        processID, blockID, allocatedSize, start - as in MemoryAllocation.placeProcess
+    """
+
+    def placeProcess(self, processID, blockID, allocatedSize=None, start=None):
+        blockFree = self.freeBlocks[blockID]
+        super().placeProcess(processID, blockID, allocatedSize, start)
+        self.blockMembers[blockID].add(processID)
+        self.resizeFree(blockID, blockFree)
+
+    """
+    Free an allocated process's memory, removing it from its block's processes
+
+    Args:
+        processID - int, process number
+    """
+
+    def releaseProcess(self, processID):
+        blockID = self.processBlocks[processID]
+        blockFree = self.freeBlocks[blockID]
+        self.blockMembers[blockID].discard(processID)
+        super().releaseProcess(processID)
+        self.resizeFree(blockID, blockFree)
+
+    """
+    Move a block in blockFreeSizes after its free memory changed
+
+    Args:
+        blockID - int, block number
+        blockFree - int, free memory the block had before
+    """
+
+    def resizeFree(self, blockID, blockFree):
+        if self.freeBlocks[blockID] != blockFree:
+            self.blockFreeSizes.remove((blockFree, blockID))
+            self.blockFreeSizes.add((self.freeBlocks[blockID], blockID))
+
+    """
+    Copy the allocator, so the copy allocates, frees and compacts on its own from the same state
+
+    Returns:
+        forked - CompactingAllocation
+    """
+
+    def fork(self):
+        forked = super().fork()
+        forked.blockMembers = [set(members) for members in self.blockMembers]
+        forked.blockFreeSizes = self.blockFreeSizes.copy()
+        return forked
+
+    """
+    Allocate a process with the chosen algorithm, compacting the cheapest block with room for it if no hole is large
+    enough
+
+    Args:
+        processID - int, process number
+        processSize - int, process size
+
+    Returns:
+        allocated - bool, False if no block has enough free memory for the process
+    """
+
+    def allocate(self, processID, processSize):
+        allocated = super().allocate(processID, processSize)
+        # compaction can not make room with less free memory than the process needs
+        if not allocated and self.onFailure and self.totalMem >= processSize:
+            startTime = time.perf_counter_ns()
+            blockID = self.cheapestBlock(processSize)
+            self.compactionTimeNs += time.perf_counter_ns() - startTime
+            if blockID is not None:
+                self.compact([blockID])
+                # the first attempt is not a failure if compaction made room
+                self.failedAllocations -= 1
+                allocated = super().allocate(processID, processSize)
+                if allocated:
+                    self.recoveredAllocations += 1
+        return allocated
+
+    """
+    Free a process's memory, compacting every fragmented block if there are too many holes
+
+    Args:
+        processID - int, process number
+    """
+
+    def free(self, processID):
+        super().free(processID)
+        if self.holeThreshold is not None and self.holeCount > self.holeThreshold * len(self.blockCapacity):
+            self.compact()
+
+    """
+    Memory compacting a block would move, its allocated memory after its first hole
+
+    Args:
+        blockID - int, block number
+
+    Returns:
+        cost - int, 0 if the block's free memory is already one hole at its end (or it has none)
+    """
+
+    def compactionCost(self, blockID):
+        blockStart = self.blockStarts[blockID]
+        hole = self.holes.firstFit(blockStart, 0)
+        if hole is None or hole[0] >= blockStart + self.blockCapacity[blockID]:
+            return 0
+        # everything before the first hole stays where it is
+        return self.blockCapacity[blockID] - self.freeBlocks[blockID] - (hole[0] - blockStart)
+
+    """
+    Find the block to compact for a process that did not fit in any hole, looking only at the blocks with room for it
+
+    Args:
+        processSize - int, process size
+
+    Returns:
+        blockID - int, block with at least processSize free memory that moves the fewest bytes when compacted,
+                  lowest block number on ties, None if no block has enough free memory
+    """
+
+    def cheapestBlock(self, processSize):
+        best = None
+        for blockFree, blockID in self.blockFreeSizes.irange((processSize, -1)):
+            cost = (self.compactionCost(blockID), blockID)
+            if best is None or cost < best:
+                best = cost
+        return None if best is None else best[1]
+
+    """
+    Find the blocks compaction would change
+
+    Returns:
+        blockIDs - list, blocks with a hole that does not end at the end of the block, in block order
+    """
+
+    def fragmentedBlocks(self):
+        blockIDs = []
+        for start, size in self.freeHoles():
+            blockID = self.blockOf(start)
+            if start + size != self.blockStarts[blockID] + self.blockCapacity[blockID] and \
+                    (not blockIDs or blockIDs[-1] != blockID):
+                blockIDs.append(blockID)
+        return blockIDs
+
+    """
+    Compact blocks, sliding their processes down to the start of the block so their free memory becomes one hole at
+    the end. Processes before a block's first hole are not moved
+
+    Args:
+        blockIDs - list, blocks to compact, None compacts every fragmented block
+
+    Returns:
+        moved - int, memory moved, 0 without counting a compaction if there are no blocks to compact
+    """
+
+    def compact(self, blockIDs=None):
+        startTime = time.perf_counter_ns()
+        if blockIDs is None:
+            blockIDs = self.fragmentedBlocks()
+        if not blockIDs:
+            self.compactionTimeNs += time.perf_counter_ns() - startTime
+            return 0
+        moved = 0
+        for blockID in blockIDs:
+            # the block's processes, in address order
+            processes = [(self.processStarts[processID], processID) for processID in self.blockMembers[blockID]]
+            blockStart = self.blockStarts[blockID]
+            blockEnd = blockStart + self.blockCapacity[blockID]
+            # take out the block's holes, they are replaced by one hole at the end
+            hole = self.holes.firstFit(blockStart, 0)
+            while hole is not None and hole[0] < blockEnd:
+                self.removeHole(*hole)
+                hole = self.holes.firstFit(hole[0] + hole[1], 0)
+            address = blockStart
+            for start, processID in sorted(processes):
+                size = self.roundedSizes.get(processID, self.processSizes[processID])
+                if start != address:
+                    self.processStarts[processID] = address
+                    moved += size
+                    self.processesMoved += 1
+                address += size
+            if address < blockEnd:
+                self.addHole(address, blockEnd - address)
+            # next fit goes on from the start of a compacted block
+            if blockStart <= self.lastAllocated < blockEnd:
+                self.lastAllocated = blockStart
+        self.bytesMoved += moved
+        self.compactions += 1
+        self.compactionTimeNs += time.perf_counter_ns() - startTime
+        return moved
+
+
+if __name__ == "__main__":
+    from benchmark import generateChurn, runChurn
+
+    blocksExample, eventsExample = generateChurn("bimodal", 1000, 20000)
+    for algName in DynamicAllocation.fitAlgorithms:
+        fixedAllocator = runChurn(blocksExample, eventsExample, algName)
+        memoryAllocator = runChurn(blocksExample, eventsExample, algName, CompactingAllocation)
+        print(f"{algName}: {fixedAllocator.failedAllocations} failed allocations without compaction, "
+              f"{memoryAllocator.failedAllocations} with {memoryAllocator.compactions} compactions "
+              f"({memoryAllocator.recoveredAllocations} recovered allocations, {memoryAllocator.bytesMoved} KB in "
+              f"{memoryAllocator.processesMoved} processes moved, {memoryAllocator.compactionTimeNs / 1e6:.1f} ms)")
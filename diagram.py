@@ -0,0 +1,149 @@
+import io
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import PatchCollection
+from matplotlib.figure import Figure
+from matplotlib.patches import Patch, Rectangle
+
+from memallocation import blockLabel, processLabel
+
+"""
+Memory allocation diagrams, drawn with matplotlib's object oriented Figure API (no pyplot, no shared files) so
+several diagrams can be rendered at the same time
+
+Memory is drawn as one stacked bar, block by block, each block showing the processes allocated to it followed by its
+free memory. All segments are drawn with a single PatchCollection, the figure height is capped, and segments too
+small to see are merged into grey "small segments" runs. Only segments tall enough to fit text are labeled.
+
+Functions:
+    memorySegments(memoryAllocator) - returns (size, label, kind) of each segment of memory, in address order
+    mergeSmallSegments(segments, minSize) - merges runs of segments smaller than minSize into one segment each
+    renderDiagram(memoryAllocator, title) - draws the diagram, returns a BytesIO holding the PNG image
+"""
+
+segmentColors = {"free": "antiquewhite", "process": "darkseagreen", "merged": "lightgrey"}
+# figure size limits in inches
+figureWidth = 10
+minFigureHeight = 3
+maxFigureHeight = 20
+dpi = 100
+# segments shorter than this many pixels are merged, text needs labelPixels to be drawn
+minSegmentPixels = 2
+labelPixels = 32
+maxLabels = 200
+
+"""
+List the segments of memory after an allocation
+
+Args:
+    memoryAllocator - MemoryAllocation, after running an allocation algorithm
+
+Returns:
+    segments - list, (size, label, kind) of each segment, kind is "process" or "free"
+"""
+
+
+def memorySegments(memoryAllocator):
+    # processes allocated to each block, in process order
+    blockProcesses = [[] for _ in memoryAllocator.blockCapacity]
+    for processID, blockID in enumerate(memoryAllocator.processBlocks):
+        if blockID != -1:
+            blockProcesses[blockID].append(processID)
+    segments = []
+    for blockID, processIDs in enumerate(blockProcesses):
+        for processID in processIDs:
+            # processes given a rounded up chunk (buddy allocation) are drawn at the size they take
+            segments.append((memoryAllocator.roundedSizes.get(processID, memoryAllocator.processSizes[processID]),
+                             f"Process {processLabel(processID)}, Memory Block {blockLabel(blockID)}", "process"))
+        if memoryAllocator.freeBlocks[blockID] > 0:
+            segments.append((memoryAllocator.freeBlocks[blockID], f"Memory Block {blockLabel(blockID)}", "free"))
+    return segments
+
+
+"""
+Merge runs of consecutive segments that are too small to see
+
+Args:
+    segments - list, (size, label, kind) segments
+    minSize - float, segments smaller than this are merged with their small neighbours
+
+Returns:
+    segments - list, (size, label, kind) segments, merged runs have kind "merged"
+"""
+
+
+def mergeSmallSegments(segments, minSize):
+    merged = []
+    runSize = 0
+    runCount = 0
+    for size, label, kind in segments:
+        if size < minSize:
+            runSize += size
+            runCount += 1
+            continue
+        if runCount:
+            merged.append((runSize, f"{runCount} small segments", "merged"))
+            runSize = 0
+            runCount = 0
+        merged.append((size, label, kind))
+    if runCount:
+        merged.append((runSize, f"{runCount} small segments", "merged"))
+    return merged
+
+
+"""
+Draw the memory allocation diagram
+
+Args:
+    memoryAllocator - MemoryAllocation, after running an allocation algorithm
+    title - str, figure title
+
+Returns:
+    buffer - io.BytesIO, PNG image, positioned at the start
+"""
+
+
+def renderDiagram(memoryAllocator, title="Memory Block Allocations"):
+    segments = memorySegments(memoryAllocator)
+    totalSize = sum(size for size, label, kind in segments)
+    # about 30 KB per inch like the original diagram, within the size limits
+    height = min(max(totalSize / 30, minFigureHeight), maxFigureHeight)
+    fig = Figure(figsize=(figureWidth, height), dpi=dpi)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+
+    if totalSize > 0:
+        sizePerPixel = totalSize / (height * dpi)
+        segments = mergeSmallSegments(segments, minSegmentPixels * sizePerPixel)
+    else:
+        sizePerPixel = 1
+    rectangles = []
+    colors = []
+    bottom = 0
+    labels = 0
+    for size, label, kind in segments:
+        rectangles.append(Rectangle((0, bottom), 1, size))
+        colors.append(segmentColors[kind])
+        if size >= labelPixels * sizePerPixel and labels < maxLabels:
+            ax.text(0.5, bottom + size / 2, f"{label}\nSize {size} KB", ha='center', va='center', fontsize=10,
+                    color='black')
+            labels += 1
+        bottom += size
+    # every segment in one collection instead of one bar each
+    ax.add_collection(PatchCollection(rectangles, facecolors=colors, edgecolors='black', linewidths=1))
+
+    # leave room on the right for the legend
+    ax.set_xlim(-0.25, 2)
+    ax.set_ylim(0, max(bottom, 1))
+    ax.set_xticks([])
+    ax.set_yticks([])
+    ax.set_ylabel('Memory Block Sizes')
+    ax.set_title(title)
+    ax.legend(handles=[Patch(facecolor=segmentColors[kind], edgecolor='black', label=legendLabel)
+                       for kind, legendLabel in [("process", "Process"), ("free", "Free Memory Block"),
+                                                 ("merged", "Small Segments (merged)")]])
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png")
+    buffer.seek(0)
+    return buffer
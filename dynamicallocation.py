@@ -0,0 +1,343 @@
+import time
+
+from sortedcontainers import SortedList
+
+from blockindex import AddressIndex, BuddyHeap
+from memallocation import MemoryAllocation
+
+"""
+Class DynamicAllocation
+Event driven version of MemoryAllocation, processes are allocated and freed over time instead of placed in one pass
+
+The memory blocks are laid out one after another in MemoryAllocation's address space (blockStarts, processStarts).
+Free memory is kept as holes, in an address ordered free list (AddressIndex) and a size index (SortedList of
+(size, start)), which also give holeCount and the largest hole in O(log n). Allocating a process splits the hole it is placed in, freeing a process merges its
+memory with the holes directly before and after it in the same block, so every event costs O(log n) in the number of
+holes.
+
+The buddy algorithm keeps free memory as aligned power of two chunks in a BuddyHeap, each chunk one hole. A process
+is rounded up to a power of two and given a chunk, splitting a larger one if needed, and freeing it merges the chunk
+with its buddy for as long as the buddy is free, so buddy can be compared with the fits on the same churn. The fits
+share one kind of hole and can be switched between while events come in (AdaptiveAllocation, branchPolicies), buddy's
+chunks can not, so it is chosen when the allocator is created.
+
+Attributes (in addition to MemoryAllocation's):
+    algName - str, algorithm used to place processes (first fit, next fit, best fit, worst fit, buddy)
+    buddyHeap - BuddyHeap, free chunks of the buddy algorithm, None for the fits
+    holes - AddressIndex, free holes ordered by start address
+    holeSizes - SortedList, (size, start) of each free hole
+    lastAllocated - int, address of the last allocation, where next fit starts searching
+    failedAllocations - int, number of allocate events that found no hole large enough
+
+Methods:
+    allocate(processID, processSize) - places a process with the chosen algorithm, returns whether it was allocated
+    allocateChunk(processID, processSize) - places a process in a buddy chunk, returns whether it was allocated
+    free(processID) - frees a process's memory and merges it with neighbouring holes
+    freeChunk(start, size) - gives a buddy chunk back, merging it with its free buddies
+    run(events, sampleEvery) - applies a stream of ("allocate", processID, size) / ("free", processID) events,
+                               returns metrics() sampled over time
+"""
+
+
+class DynamicAllocation(MemoryAllocation):
+    # algorithms that place processes in the same holes, so the allocator can switch between them
+    fitAlgorithms = ["first fit", "next fit", "best fit", "worst fit"]
+    algorithms = fitAlgorithms + ["buddy"]
+
+    """
+    Initialize DynamicAllocation with free memory blocks, each block starts out as one hole
+
+    Args:
+        blocks - list, array of memory block sizes
+        algName - str, algorithm used to place processes, one of DynamicAllocation.algorithms
+        checkMetrics - bool, check the running totals against a full recalculation every time metrics() is called
+    """
+
+    def __init__(self, blocks, algName="first fit", checkMetrics=False):
+        if algName not in self.algorithms:
+            raise ValueError(f"unknown algorithm {algName!r}, expected one of {self.algorithms}")
+        # the holes are built for the algorithm when the blocks are set up
+        self.algName = algName
+        self.lastAllocated = 0
+        self.failedAllocations = 0
+        super().__init__(blocks, checkMetrics)
+
+    """
+    Make every block one free hole again
+    """
+
+    def resetHoles(self):
+        self.setHoles((blockStart, blockSize) for blockStart, blockSize in zip(self.blockStarts, self.blockCapacity)
+                      if blockSize > 0)
+
+    """
+    Replace the free holes, building the address ordered free list in O(n). The buddy algorithm splits them into
+    aligned chunks, each chunk a hole
+
+    Args:
+        holes - iterable, (start, size) of each free hole in address order
+    """
+
+    def setHoles(self, holes):
+        holes = list(holes)
+        if self.algName == "buddy":
+            self.buddyHeap = BuddyHeap(self.blockCapacity, holes, merging=True)
+            holes = [(address, 1 << order) for address, order in self.buddyHeap.chunks()]
+        else:
+            self.buddyHeap = None
+        self.holes = AddressIndex(holes)
+        self.holeSizes = SortedList((size, start) for start, size in holes)
+        self.holeCount = len(holes)
+
+    """
+    Add a free hole to the address ordered free list and size index
+
+    Args:
+        start - int, start address of hole
+        size - int, size of hole
+    """
+
+    def addHole(self, start, size):
+        self.holes.insert(start, size)
+        self.holeSizes.add((size, start))
+        self.holeCount += 1
+
+    """
+    Remove a free hole from the address ordered free list and size index
+
+    Args:
+        start - int, start address of hole
+        size - int, size of hole
+    """
+
+    def removeHole(self, start, size):
+        self.holes.remove(start)
+        self.holeSizes.remove((size, start))
+        self.holeCount -= 1
+
+    """
+    List the free holes
+
+    Returns:
+        holes - list, (start, size) of each free hole in address order
+    """
+
+    def freeHoles(self):
+        return self.holes.holes()
+
+    """
+    Find the largest free hole from the size index
+
+    Returns:
+        (start, size) - tuple, largest free hole, lowest address on ties, None if there are no holes
+    """
+
+    def largestFreeHole(self):
+        if not self.holeSizes:
+            return None
+        size, start = self.holeSizes[self.holeSizes.bisect_left((self.holeSizes[-1][0], -1))]
+        return start, size
+
+    """
+    Find a hole for a process with the chosen algorithm
+
+    Args:
+        processSize - int, process size
+
+    Returns:
+        (start, size) - tuple, hole to place the process in, None if no hole is large enough
+    """
+
+    def findHole(self, processSize):
+        if self.algName == "first fit":
+            return self.holes.firstFit(0, processSize)
+        if self.algName == "next fit":
+            # starting at last allocation, wrapping around to the first hole
+            hole = self.holes.firstFit(self.lastAllocated, processSize)
+            if hole is None:
+                hole = self.holes.firstFit(0, processSize)
+            return hole
+        if self.algName == "best fit":
+            # smallest hole large enough, lowest address on ties
+            i = self.holeSizes.bisect_left((processSize, -1))
+        else:
+            # largest hole, lowest address on ties
+            if not self.holeSizes or self.holeSizes[-1][0] < processSize:
+                return None
+            i = self.holeSizes.bisect_left((self.holeSizes[-1][0], -1))
+        if i == len(self.holeSizes):
+            return None
+        size, start = self.holeSizes[i]
+        return start, size
+
+    """
+    Allocate a process, placing it at the start of the hole the chosen algorithm finds
+
+    Args:
+        processID - int, process number
+        processSize - int, process size
+
+    Returns:
+        allocated - bool, False if no hole was large enough
+    """
+
+    def allocate(self, processID, processSize):
+        # grow process arrays to fit new process numbers
+        while len(self.processSizes) <= processID:
+            self.processSizes.append(0)
+            self.processBlocks.append(-1)
+            self.processStarts.append(-1)
+        if self.processBlocks[processID] != -1:
+            raise ValueError(f"process {processID} is already allocated")
+        self.processSizes[processID] = processSize
+        if self.buddyHeap is not None:
+            return self.allocateChunk(processID, processSize)
+        hole = self.findHole(processSize)
+        # no suitable hole found, process stays marked as not allocated (-1)
+        if hole is None:
+            self.failedAllocations += 1
+            return False
+        start, holeSize = hole
+        # split the hole, what is left after the process stays free
+        self.removeHole(start, holeSize)
+        if holeSize > processSize:
+            self.addHole(start + processSize, holeSize - processSize)
+        blockID = self.blockOf(start)
+        self.placeProcess(processID, blockID, start=start)
+        self.lastAllocated = start
+        return True
+
+    """
+    Allocate a process with the buddy algorithm, giving it the lowest addressed chunk of the smallest free order that
+    holds it. Processes of size 0 take no chunk, they are placed at the start of the first hole as with First Fit
+
+    Args:
+        processID - int, process number, its size must already be in processSizes
+        processSize - int, process size
+
+    Returns:
+        allocated - bool, False if no free chunk was large enough
+    """
+
+    def allocateChunk(self, processID, processSize):
+        if processSize == 0:
+            hole = self.holes.firstFit(0, 0)
+            if hole is None:
+                self.failedAllocations += 1
+                return False
+            self.placeProcess(processID, self.blockOf(hole[0]), start=hole[0])
+            return True
+        chunk = self.buddyHeap.allocate(processSize)
+        # no free chunk large enough, process stays marked as not allocated (-1)
+        if chunk is None:
+            self.failedAllocations += 1
+            return False
+        address, order, splitOrder = chunk
+        # the chunk that was split is replaced by the upper halves given back to the heap
+        self.removeHole(address, 1 << splitOrder)
+        for freeOrder in range(order, splitOrder):
+            self.addHole(address + (1 << freeOrder), 1 << freeOrder)
+        self.placeProcess(processID, self.blockOf(address), 1 << order, address)
+        self.lastAllocated = address
+        return True
+
+    """
+    Give a buddy chunk back to the heap, merging it with its buddy for as long as the buddy is free
+
+    Args:
+        start - int, start address of chunk
+        size - int, chunk size, a power of two
+    """
+
+    def freeChunk(self, start, size):
+        order = size.bit_length() - 1
+        address, mergedOrder = self.buddyHeap.free(start, order)
+        # the buddies merged into the chunk are no longer holes of their own
+        blockStart = self.blockStarts[self.blockOf(start)]
+        for freeOrder in range(order, mergedOrder):
+            buddy = blockStart + ((start - blockStart) ^ (1 << freeOrder))
+            self.removeHole(buddy, 1 << freeOrder)
+            start = min(start, buddy)
+        self.addHole(address, 1 << mergedOrder)
+
+    """
+    Free a process's memory, merging it with the holes directly before and after it in the same block (with its free
+    buddies for the buddy algorithm)
+
+    Args:
+        processID - int, process number
+    """
+
+    def free(self, processID):
+        if processID >= len(self.processBlocks) or self.processBlocks[processID] == -1:
+            raise ValueError(f"process {processID} is not allocated")
+        blockID = self.processBlocks[processID]
+        start = self.processStarts[processID]
+        size = self.roundedSizes.get(processID, self.processSizes[processID])
+        self.releaseProcess(processID)
+        # zero size processes take up no memory, nothing to merge
+        if size == 0:
+            return
+        if self.buddyHeap is not None:
+            self.freeChunk(start, size)
+            return
+        blockStart = self.blockStarts[blockID]
+        blockEnd = blockStart + self.blockCapacity[blockID]
+        # merge with hole ending where this memory starts
+        before = self.holes.before(start)
+        if before is not None and before[0] + before[1] == start and before[0] >= blockStart:
+            self.removeHole(*before)
+            start, size = before[0], before[1] + size
+        # merge with hole starting where this memory ends
+        after = self.holes.after(start)
+        if after is not None and after[0] == start + size and after[0] < blockEnd:
+            self.removeHole(*after)
+            size += after[1]
+        self.addHole(start, size)
+        # next fit continues from the start of the merged hole if it was inside it
+        if start <= self.lastAllocated < start + size:
+            self.lastAllocated = start
+
+    """
+    Apply a stream of allocate and free events
+
+    Args:
+        events - iterable, ("allocate", processID, size) or ("free", processID) tuples
+        sampleEvery - int, record metrics after every sampleEvery events
+
+    Returns:
+        history - list, (event number, totalMem, allocatedMem, internalFragmentTotal, externalFragmentTotal) samples
+        executionTime - float, time execution took
+    """
+
+    def run(self, events, sampleEvery=1):
+        history = []
+        # time the simulation
+        startTime = time.perf_counter_ns()
+        for eventNumber, event in enumerate(events, 1):
+            if event[0] == "allocate":
+                self.allocate(event[1], event[2])
+            elif event[0] == "free":
+                self.free(event[1])
+            else:
+                raise ValueError(f"unknown event {event[0]!r}, expected 'allocate' or 'free'")
+            if eventNumber % sampleEvery == 0:
+                history.append((eventNumber,) + self.metrics())
+        endTime = time.perf_counter_ns()
+        self.executionTimeNs = endTime - startTime
+        executionTime = self.executionTimeNs / 1e9
+        return history, executionTime
+
+
+if __name__ == "__main__":
+    freeBlocksExample = [50, 150, 300, 350, 600]
+    eventsExample = [("allocate", 0, 300), ("allocate", 1, 25), ("allocate", 2, 125), ("free", 0),
+                     ("allocate", 3, 50), ("allocate", 4, 400), ("free", 1), ("free", 2)]
+
+    for algName in DynamicAllocation.algorithms:
+        memoryAllocator = DynamicAllocation(freeBlocksExample, algName)
+        history, executionTime = memoryAllocator.run(eventsExample)
+        print(f"{algName}:")
+        for eventNumber, totalMem, allocatedMem, internalFragmentTotal, externalFragmentTotal in history:
+            print(f"\tEvent {eventNumber}: Total Available Memory={totalMem} KB, Allocated Memory in Use={allocatedMem} KB")
+        print(memoryAllocator.printResults())
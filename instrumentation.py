@@ -0,0 +1,76 @@
+import cProfile
+import io
+import pstats
+import time
+import tracemalloc
+
+"""
+Class Instrumentation
+Optional measurements taken around an allocation run, on top of the timing and scan counters every run records
+
+Attributes:
+    profile - bool, run under cProfile and report the most expensive functions
+    traceMemory - bool, run under tracemalloc and report peak memory allocated by Python
+    profileLimit - int, number of functions listed in the profile report
+
+Methods:
+    run(function, *args) - calls function(*args) with the chosen measurements,
+                           returns its return value and a report dictionary
+"""
+
+
+class Instrumentation:
+    """
+    Initialize Instrumentation with which measurements to take
+
+    Args:
+        profile - bool, capture a cProfile report
+        traceMemory - bool, capture peak traced memory with tracemalloc
+        profileLimit - int, number of functions listed in the profile report
+    """
+
+    def __init__(self, profile=False, traceMemory=False, profileLimit=10):
+        self.profile = profile
+        self.traceMemory = traceMemory
+        self.profileLimit = profileLimit
+
+    """
+    Call a function with the chosen measurements
+
+    Args:
+        function - callable, function to measure
+        args - arguments for function
+
+    Returns:
+        value - return value of function
+        report - dictionary, wallTimeNs (int, perf_counter_ns time including measurement overhead),
+                 profile (str, cProfile report) if profile is set, peakMemory (int, bytes) if traceMemory is set
+    """
+
+    def run(self, function, *args):
+        report = {}
+        # only stop tracemalloc afterwards if it was not already running
+        startedTracing = self.traceMemory and not tracemalloc.is_tracing()
+        if startedTracing:
+            tracemalloc.start()
+        if self.traceMemory:
+            tracemalloc.reset_peak()
+        profiler = cProfile.Profile() if self.profile else None
+        startTime = time.perf_counter_ns()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            value = function(*args)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            report["wallTimeNs"] = time.perf_counter_ns() - startTime
+            if self.traceMemory:
+                report["peakMemory"] = tracemalloc.get_traced_memory()[1]
+            if startedTracing:
+                tracemalloc.stop()
+        if profiler is not None:
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(self.profileLimit)
+            report["profile"] = out.getvalue()
+        return value, report
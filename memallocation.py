@@ -1,46 +1,394 @@
+import copy
 import time
+from array import array
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+
+from blockindex import BuddyHeap, SegmentTree, SizeClasses, SizeIndex
+from scenariostore import ScenarioStore, attachStore
 
 """
 Class MemoryAllocation
 Create object to be calculating memory allocations for given different algorithms
 
 Attributes: 
-    freeBlocks - dictionary, user input information for memory blocks and sizes, saved with letter ids
-    allocations - dictionary, user input information for processes and sizes, saved with letter ids
+    blockCapacity - array, size of each memory block, indexed by block number
+    freeBlocks - array, free memory left in each memory block, indexed by block number
+    processSizes - array, size of each process from the last allocation, indexed by process number
+    processBlocks - array, block number each process was allocated to, -1 if not allocated
+    blocksScanned - int, number of blocks looked at while placing processes in the last allocation
+                    (indexed methods count one per index lookup)
+    executionTimeNs - int, time the last allocation took, in nanoseconds (time.perf_counter_ns)
+    roundedSizes - dictionary, memory taken by each process that was given more memory than its size (buddy allocation
+                   rounds sizes up to a power of two), by process number
+    roundingWaste - int, total memory given to processes beyond their sizes, counted as internal fragmentation
+    blockStarts - array, start address of each memory block, blocks are laid out one after another in one address space
+    processStarts - array, start address of each process's memory, -1 if not allocated
+    buddyHeap - BuddyHeap, free chunks of the last buddy allocation, None when the holes are the ends of the blocks
+    holeCount - int, number of free holes (contiguous free memory)
+    largestTailBlock - int, block with the largest hole at its end (lowest block number on ties), -1 if there are no
+                       holes, None when it has to be found again
+
+State is kept in flat array('q') arrays (8 bytes per entry) rather than dictionaries so large inputs stay compact.
+
+Blocks and processes are identified by their integer position in the input lists, letter labels are only generated
+when results are displayed (see blockLabel and processLabel)
+
+The one pass methods place processes one after another from the start of each block, so a block's free memory is one
+hole at its end and the holes are worked out from blockStarts, blockCapacity and freeBlocks instead of being stored.
+The buddy system's holes are the free chunks of its BuddyHeap and DynamicAllocation splits and merges holes anywhere,
+keeping them in its own indexes. holeCount is kept up to date as processes are placed and largestHole() is only looked
+for again after the largest hole shrinks, so the fragmentation metrics reflect where the free memory actually is
+without a structure per hole
 
 Methods: 
     arrayToDict(inputArr) - given an array, creates & returns dictionary with ids given in reverse alphabetical order
+    resetProcesses(processesArr) - frees every block, saves process sizes, marks every process as not allocated and
+                                   resets blocksScanned
     firstFitAllocation(processesArr) - given processes, determines allocation order based on First Fit algorithm
-                                        saves allocation information to allocations dict, returns execution time
+                                        saves allocation information to processBlocks, returns execution time
     nextFitAllocation(processesArr) - given processes, determines allocation order based on Next Fit algorithm
-                                        saves allocation information to allocations dict, returns execution time
+                                        saves allocation information to processBlocks, returns execution time
     bestFitAllocation(processesArr) - given processes, determines allocation order based on Best Fit algorithm
-                                        saves allocation information to allocations dict, returns execution time
+                                        saves allocation information to processBlocks, returns execution time
     worstFitAllocation(processesArr) - given processes, determines allocation order based on Worst Fit algorithm
-                                        saves allocation information to allocations dict, returns execution time
-    metrics() - calculates & returns metrics for an allocation (total memory, allocated memory, internal & external fragmentation)
-    bestAlgorithm(freeBlocks, processes, determinant) - determines best algorithm based on given determinant (totalMem, allocatedMem, internalFragmentation, externalFragmentation, executionTime)
+                                        saves allocation information to processBlocks, returns execution time
+    firstFitIndexedAllocation(processesArr) - First Fit using a segment tree over free block sizes, O(log n) per process
+    nextFitIndexedAllocation(processesArr) - Next Fit using a segment tree over free block sizes, O(log n) per process
+    bestFitIndexedAllocation(processesArr) - Best Fit using a size ordered index of free blocks, O(log n) per process
+    worstFitIndexedAllocation(processesArr) - Worst Fit using a size ordered index of free blocks, O(log n) per process
+    buddyAllocation(processesArr) - binary buddy system, each process gets a power of two chunk split from a BuddyHeap,
+                                        O(log n) per process
+    segregatedFitAllocation(processesArr, slabObjects) - segregated fit over power of two size classes of free blocks,
+                                        with slab caches for repeated process sizes, O(1) per process in the common case
+    placeProcess(processID, blockID, allocatedSize, start) - allocates a process to a block and updates the running metric totals
+    releaseProcess(processID) - frees a process's memory and updates the running metric totals
+    resetHoles() - makes every block one free hole again
+    setHoles(holes) - replaces the free holes, the ends of the blocks or the chunks of a buddy allocation
+    tailHoles() - returns (start, size) of the free memory at the end of every block that has any
+    freeHoles() - returns (start, size) of every free hole in address order
+    largestFreeHole() - returns (start, size) of the largest free hole, lowest address on ties
+    largestHole() - returns the size of the largest free hole
+    blockOf(address) - returns the block an address is in
+    fork() - returns an independent copy of the allocation state, for "what if" runs from the same state
+    metrics() - returns metrics for an allocation (total memory, allocated memory, internal & external fragmentation) in O(1)
+    summary() - returns dictionary of metrics, hole statistics, execution time and blocks scanned for the last allocation
+    recomputeMetrics() - calculates the same metrics from scratch, used to check the running totals
+    bestAlgorithm(freeBlocks, processes, determinant, engine, workers, instrumentation) - determines best algorithm based on given determinant (totalMem, allocatedMem, internalFragmentation, externalFragmentation, executionTime)
+                                        engine selects the allocation methods used ("scan" or "indexed"),
+                                        workers runs the algorithms in a process pool when given,
+                                        instrumentation adds optional profiling to each algorithm's results
                                         returns name of best algorithm, and results dictionary with calculated metrics of each algorithm
-    memoryLayout() - returns string representation for memory layout after allocations
-    printResults() - returns string representation of memory layout after allocations and the allocations            
+    bestAlgorithms(scenarios, determinant, engine, workers, instrumentation) - bestAlgorithm for a list of (freeBlocks, processes) scenarios,
+                                        every algorithm of every scenario is run in one process pool when workers is given
+    rankAlgorithms(freeBlocks, processes, weights, engine, workers, instrumentation) - runs every algorithm once and ranks
+                                        them on every determinant, by a weighted score and by Pareto front
+    memoryLayout(offset, limit) - returns string representation for memory layout after allocations
+    printResults(offset, limit) - returns string representation of memory layout after allocations and the allocations,
+                                  a page of limit blocks and processes from offset for large inputs
+
+Functions:
+    runAlgorithm(freeBlocks, processes, methodName, instrumentation) - runs one algorithm on a fresh MemoryAllocation
+    runStoredAlgorithm(storeName, scenarioIndex, methodName, instrumentation) - runAlgorithm on a ScenarioStore scenario
+    rankResults(results, weights) - rankings for every determinant, weighted ranking and Pareto front of algorithm metrics
+    weightedRanking(results, weights) - algorithms ordered by a weighted sum of their scaled metrics
+    paretoFront(results, metricNames) - algorithms not beaten by another algorithm on every metric
+    pageEnd(offset, limit, total), pageNote(offset, end, total, name) - paging of printResults and memoryLayout
+"""
+
+alphabet = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+reverseAlphabet = 'ZYXWVUTSRQPONMLKJIHGFEDCBA'
+# metrics algorithms are ranked on, lower is better for each
+determinants = ["totalMem", "allocatedMem", "internalFragmentation", "externalFragmentation", "executionTime"]
+# determinants that do not change from run to run, the defaults for the weighted ranking and the Pareto front, so
+# timing noise does not reorder them
+memoryDeterminants = ["totalMem", "allocatedMem", "internalFragmentation", "externalFragmentation"]
+
+"""
+Give a number a letter label, A..Z then AA, AB, ... (spreadsheet column style) so any number of ids can be labeled
+
+Args:
+    index - int, block or process number
+    letters - str, letters to label with, in order
+
+Returns:
+    label - str, letter label for index
+"""
+
+
+def letterLabel(index, letters=alphabet):
+    label = ""
+    index += 1
+    while index > 0:
+        index, remainder = divmod(index - 1, len(letters))
+        label = letters[remainder] + label
+    return label
+
+
+"""
+Label for a memory block, in alphabetical order
+
+Args:
+    index - int, block number
+
+Returns:
+    label - str, block id
 """
 
 
+def blockLabel(index):
+    return letterLabel(index)
+
+
+"""
+Label for a process, in reverse alphabetical order with a 'P.' at the beginning to denote it is a process
+
+Args:
+    index - int, process number
+
+Returns:
+    label - str, process id
+"""
+
+
+def processLabel(index):
+    return 'P.' + letterLabel(index, reverseAlphabet)
+
+
 class MemoryAllocation:
+    # allocation method used for each algorithm, by engine
+    engines = {
+        "scan": {"first fit": "firstFitAllocation", "next fit": "nextFitAllocation",
+                 "best fit": "bestFitAllocation", "worst fit": "worstFitAllocation", "buddy": "buddyAllocation",
+                 "segregated fit": "segregatedFitAllocation"},
+        "indexed": {"first fit": "firstFitIndexedAllocation", "next fit": "nextFitIndexedAllocation",
+                    "best fit": "bestFitIndexedAllocation", "worst fit": "worstFitIndexedAllocation",
+                    "buddy": "buddyAllocation", "segregated fit": "segregatedFitAllocation"},
+    }
+
+    """
+    Initialize MemoryAllocation with free memory blocks self.freeBlocks and no processes allocated
+
+    Args:
+        blocks - list, array of memory block sizes (or a memoryview of 8 byte integers, used without copying)
+        checkMetrics - bool, check the running totals against a full recalculation every time metrics() is called
+    """
+
+    def __init__(self, blocks, checkMetrics=False):
+        # block sizes are never changed, a shared memory view (see scenariostore.py) is used in place
+        self.blockCapacity = blocks if isinstance(blocks, memoryview) else array('q', blocks)
+        self.executionTimeNs = 0
+        # running totals behind metrics(), kept up to date by placeProcess and releaseProcess
+        self.checkMetrics = checkMetrics
+        # address space, blocks are laid out one after another
+        self.blockStarts = array('q')
+        address = 0
+        for blockSize in self.blockCapacity:
+            self.blockStarts.append(address)
+            address += blockSize
+        self.resetProcesses([])
+
+    """
+    Reset allocation state for a new list of processes: every block is free again (one hole per block) and every
+    process starts out not allocated, so the same MemoryAllocation can run one algorithm after another
+
+    Args:
+        processesArr - list, array of process sizes
+    """
+
+    def resetProcesses(self, processesArr):
+        self.freeBlocks = array('q', self.blockCapacity)
+        self.resetHoles()
+        self.processSizes = processesArr if isinstance(processesArr, memoryview) else array('q', processesArr)
+        self.processBlocks = array('q', [-1]) * len(self.processSizes)
+        self.processStarts = array('q', [-1]) * len(self.processSizes)
+        self.blocksScanned = 0
+        self.totalMem = sum(self.freeBlocks)
+        self.allocatedMem = 0
+        self.blockProcessCounts = array('q', [0]) * len(self.blockCapacity)
+        self.occupiedFree = 0
+        self.roundedSizes = {}
+        self.roundingWaste = 0
+
+    """
+    Allocate a process to a block, updating the running totals behind metrics()
+
+    Args:
+        processID - int, process number, its size must already be in processSizes
+        blockID - int, block number
+        allocatedSize - int, memory taken from the block when it is more than the process size (rounded up sizes),
+                        None takes exactly the process size
+        start - int, start address of the process's memory, the caller has already taken it out of the holes;
+                None places it at the start of the hole at the end of the block, splitting that hole
+    """
+
+    def placeProcess(self, processID, blockID, allocatedSize=None, start=None):
+        processSize = self.processSizes[processID]
+        if allocatedSize is None:
+            allocatedSize = processSize
+        else:
+            self.roundedSizes[processID] = allocatedSize
+            self.roundingWaste += allocatedSize - processSize
+        blockFree = self.freeBlocks[blockID]
+        if start is None:
+            start = self.blockStarts[blockID] + self.blockCapacity[blockID] - blockFree
+            # the hole at the end of the block shrinks, or is filled
+            if allocatedSize > 0:
+                if blockFree == allocatedSize:
+                    self.holeCount -= 1
+                if blockID == self.largestTailBlock:
+                    self.largestTailBlock = None
+        count = self.blockProcessCounts[blockID]
+        self.processBlocks[processID] = blockID
+        self.processStarts[processID] = start
+        self.freeBlocks[blockID] = blockFree - allocatedSize
+        self.blockProcessCounts[blockID] = count + 1
+        self.totalMem -= allocatedSize
+        self.allocatedMem += processSize
+        # free memory left in blocks holding processes, see metrics()
+        self.occupiedFree += blockFree - allocatedSize - (blockFree if count else 0)
+
+    """
+    Free an allocated process's memory, updating the running totals behind metrics(). The memory is not returned to
+    the holes, the caller adds it back (DynamicAllocation.free merges it with the neighbouring holes)
+
+    Args:
+        processID - int, process number
+    """
+
+    def releaseProcess(self, processID):
+        processSize = self.processSizes[processID]
+        allocatedSize = self.roundedSizes.pop(processID, processSize)
+        self.roundingWaste -= allocatedSize - processSize
+        blockID = self.processBlocks[processID]
+        blockFree = self.freeBlocks[blockID]
+        count = self.blockProcessCounts[blockID]
+        self.processBlocks[processID] = -1
+        self.processStarts[processID] = -1
+        self.freeBlocks[blockID] = blockFree + allocatedSize
+        self.blockProcessCounts[blockID] = count - 1
+        self.totalMem += allocatedSize
+        self.allocatedMem -= processSize
+        self.occupiedFree += (blockFree + allocatedSize if count > 1 else 0) - blockFree
+
+    """
+    Make every block one free hole again, the hole at the end of a block with nothing placed in it
+    """
+
+    def resetHoles(self):
+        self.buddyHeap = None
+        self.holeCount = sum(1 for blockSize in self.blockCapacity if blockSize > 0)
+        self.largestTailBlock = None
+
+    """
+    Replace the free holes, used when state is copied or loaded. Holes at the end of every block with free memory are
+    kept as freeBlocks, any other holes are the free chunks of a buddy allocation and go in a BuddyHeap
+
+    Args:
+        holes - iterable, (start, size) of each free hole in address order
+    """
+
+    def setHoles(self, holes):
+        holes = list(holes)
+        if holes == self.tailHoles():
+            self.buddyHeap = None
+            self.holeCount = len(holes)
+        else:
+            self.buddyHeap = BuddyHeap(self.blockCapacity, holes)
+            self.holeCount = sum(self.buddyHeap.freeCounts)
+        self.largestTailBlock = None
+
+    """
+    List the free memory at the end of every block, the holes of the one pass methods
+
+    Returns:
+        holes - list, (start, size) of the free memory at the end of each block that has any, in address order
     """
-    Initialize MemoryAllocation with free memory blocks and an allocation dictionary self.freeBlocks
+
+    def tailHoles(self):
+        return [(blockStart + blockSize - blockFree, blockFree) for blockStart, blockSize, blockFree
+                in zip(self.blockStarts, self.blockCapacity, self.freeBlocks) if blockFree > 0]
+
+    """
+    List the free holes
+
+    Returns:
+        holes - list, (start, size) of each free hole in address order
+    """
+
+    def freeHoles(self):
+        if self.buddyHeap is not None:
+            return [(address, 1 << order) for address, order in self.buddyHeap.chunks()]
+        return self.tailHoles()
+
+    """
+    Find the largest free hole. The block with the largest hole at its end is looked for in O(n) only after that hole
+    has shrunk, so it is found once per allocation run rather than once per process
+
+    Returns:
+        (start, size) - tuple, largest free hole, lowest address on ties, None if there are no holes
+    """
+
+    def largestFreeHole(self):
+        if self.buddyHeap is not None:
+            chunk = self.buddyHeap.largestChunk()
+            return None if chunk is None else (chunk[0], 1 << chunk[1])
+        if self.largestTailBlock is None:
+            # lowest numbered block with the most free memory
+            blockFree = max(self.freeBlocks, default=0)
+            self.largestTailBlock = self.freeBlocks.index(blockFree) if blockFree > 0 else -1
+        if self.largestTailBlock == -1:
+            return None
+        blockID = self.largestTailBlock
+        blockFree = self.freeBlocks[blockID]
+        return self.blockStarts[blockID] + self.blockCapacity[blockID] - blockFree, blockFree
+
+    """
+    Size of the largest free hole, the largest process that can still be placed
+
+    Returns:
+        largestHole - int, 0 if there are no holes
+    """
+
+    def largestHole(self):
+        hole = self.largestFreeHole()
+        return 0 if hole is None else hole[1]
+
+    """
+    Find which memory block an address is in
 
     Args:
-        blocks - list, array of memory block sizes
+        address - int, memory address
+
+    Returns:
+        blockID - int, block number
     """
 
-    def __init__(self, blocks):
-        alphabet = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
-        self.freeBlocks = {alphabet[i]: element for i, element in enumerate(blocks)}
-        self.allocations = {}
+    def blockOf(self, address):
+        return bisect_right(self.blockStarts, address) - 1
+
+    """
+    Copy the allocation state so the copy can go on allocating and freeing without changing this one. Arrays are
+    copied with slices (one memory copy each), block sizes and shared memory views are never changed so they are shared,
+    and the holes are rebuilt from freeHoles()
 
+    Returns:
+        forked - MemoryAllocation, same class and state as this one
     """
-    Give each process a label 
+
+    def fork(self):
+        forked = copy.copy(self)
+        forked.freeBlocks = self.freeBlocks[:]
+        forked.processSizes = self.processSizes[:]
+        forked.processBlocks = self.processBlocks[:]
+        forked.processStarts = self.processStarts[:]
+        forked.blockProcessCounts = self.blockProcessCounts[:]
+        forked.roundedSizes = dict(self.roundedSizes)
+        forked.setHoles(self.freeHoles())
+        return forked
+
+    """
+    Give each process a label, used when displaying processes
 
     Args:  
         inputArr - list, array of process sizes
@@ -50,10 +398,8 @@ class MemoryAllocation:
     """
 
     def arrayToDict(self, inputArr):
-        # Map each element of the array to a letter in the alphabet
-        reverseAlphabet = 'ZYXWVUTSRQPONMLKJIHGFEDBCA'
-        # Create a dictionary combining the alphabet letters and array elements
-        result = {('P.' + reverseAlphabet[i]): element for i, element in enumerate(inputArr)}
+        # Create a dictionary combining the process labels and array elements
+        result = {processLabel(i): element for i, element in enumerate(inputArr)}
 
         return result
 
@@ -68,26 +414,23 @@ class MemoryAllocation:
     """
 
     def firstFitAllocation(self, processesArr):
-        # create dictionary
-        processes = self.arrayToDict(processesArr)
         # time the algorithm execution
-        startTime = time.time()
-        self.allocations.clear()
-        for processID, processSize in processes.items():
-            allocated = False
+        startTime = time.perf_counter_ns()
+        self.resetProcesses(processesArr)
+        for processID, processSize in enumerate(self.processSizes):
             # starting at first block
-            for blockID, blockSize in self.freeBlocks.items():
+            for blockID, blockSize in enumerate(self.freeBlocks):
                 # if process will fit in block
                 if blockSize >= processSize:
-                    self.allocations[processID] = (blockID, processSize)
-                    self.freeBlocks[blockID] -= processSize
-                    allocated = True
+                    self.placeProcess(processID, blockID)
+                    self.blocksScanned += blockID + 1
                     break
-            # no suitable block found, mark process as not allocated
-            if not allocated:
-                self.allocations[processID] = None
-        endTime = time.time()
-        executionTime = endTime - startTime
+            # no suitable block found, process stays marked as not allocated (-1)
+            else:
+                self.blocksScanned += len(self.freeBlocks)
+        endTime = time.perf_counter_ns()
+        self.executionTimeNs = endTime - startTime
+        executionTime = self.executionTimeNs / 1e9
         return executionTime
 
     """
@@ -101,28 +444,28 @@ class MemoryAllocation:
     """
 
     def nextFitAllocation(self, processesArr):
-        # create dictionary
-        processes = self.arrayToDict(processesArr)
         # time the algorithm execution
-        startTime = time.time()
-        self.allocations.clear()
+        startTime = time.perf_counter_ns()
+        self.resetProcesses(processesArr)
+        blockCount = len(self.freeBlocks)
         # keep track of last block allocated for next starting point
-        lastAllocated = None
-        for processID, processSize in processes.items():
-            allocated = False
-            for blockID, blockSize in self.freeBlocks.items():
-                # if block is big enough and has come after lastAllocated
-                if blockSize >= processSize and (lastAllocated is None or blockID >= lastAllocated):
-                    self.allocations[processID] = (blockID, processSize)
-                    self.freeBlocks[blockID] -= processSize
-                    allocated = True
+        lastAllocated = 0
+        for processID, processSize in enumerate(self.processSizes):
+            # starting at last block allocated, wrapping around to the first block
+            for offset in range(blockCount):
+                blockID = (lastAllocated + offset) % blockCount
+                # if block is big enough
+                if self.freeBlocks[blockID] >= processSize:
+                    self.placeProcess(processID, blockID)
                     lastAllocated = blockID
+                    self.blocksScanned += offset + 1
                     break
-            # no suitable block found, mark process as not allocated
-            if not allocated:
-                self.allocations[processID] = None
-        endTime = time.time()
-        executionTime = endTime - startTime
+            # no suitable block found, process stays marked as not allocated (-1)
+            else:
+                self.blocksScanned += blockCount
+        endTime = time.perf_counter_ns()
+        self.executionTimeNs = endTime - startTime
+        executionTime = self.executionTimeNs / 1e9
         return executionTime
 
     """
@@ -136,15 +479,14 @@ class MemoryAllocation:
     """
 
     def bestFitAllocation(self, processesArr):
-        # create dictionary
-        processes = self.arrayToDict(processesArr)
         # time the algorithm execution
-        startTime = time.time()
-        self.allocations.clear()
+        startTime = time.perf_counter_ns()
+        self.resetProcesses(processesArr)
 
-        for processID, processSize in processes.items():
+        for processID, processSize in enumerate(self.processSizes):
             bestFit = None  # keep track of allocations for comparisons
-            for blockID, blockSize in self.freeBlocks.items():
+            self.blocksScanned += len(self.freeBlocks)
+            for blockID, blockSize in enumerate(self.freeBlocks):
                 # if block is large enough
                 if blockSize >= processSize:
                     # update bestFit if block is smallest found so far
@@ -152,14 +494,11 @@ class MemoryAllocation:
                         bestFit = blockID
             # allocate process to best fit block
             if bestFit is not None:
-                allocatedSize = min(processSize, self.freeBlocks[bestFit])
-                self.allocations[processID] = (bestFit, allocatedSize)
-                self.freeBlocks[bestFit] -= allocatedSize
-            # no suitable block found, mark process as not allocated
-            else:
-                self.allocations[processID] = None
-        endTime = time.time()
-        executionTime = endTime - startTime
+                self.placeProcess(processID, bestFit)
+            # no suitable block found, process stays marked as not allocated (-1)
+        endTime = time.perf_counter_ns()
+        self.executionTimeNs = endTime - startTime
+        executionTime = self.executionTimeNs / 1e9
         return executionTime
 
     """
@@ -173,57 +512,322 @@ class MemoryAllocation:
     """
 
     def worstFitAllocation(self, processesArr):
-        # create dictionary
-        processes = self.arrayToDict(processesArr)
         # time algorithm execution
-        startTime = time.time()
-        self.allocations.clear()
-        for processID, processSize in processes.items():
+        startTime = time.perf_counter_ns()
+        self.resetProcesses(processesArr)
+        for processID, processSize in enumerate(self.processSizes):
             worstFit = None
-            for blockID, blockSize in self.freeBlocks.items():
+            self.blocksScanned += len(self.freeBlocks)
+            for blockID, blockSize in enumerate(self.freeBlocks):
                 # if block large enough for process
                 if blockSize >= processSize:
                     # update worstFit if block is largest found so far
-                    if worstFit is None or blockSize < self.freeBlocks[worstFit]:
+                    if worstFit is None or blockSize > self.freeBlocks[worstFit]:
                         worstFit = blockID
             # allocate process to worst fit block
             if worstFit is not None:
-                allocatedSize = max(processSize, self.freeBlocks[worstFit])
-                self.allocations[processID] = (worstFit, allocatedSize)
-                self.freeBlocks[worstFit] -= allocatedSize
-            # no suitable block found, mark process as not allocated
-            else:
-                self.allocations[processID] = None
-        endTime = time.time()
-        executionTime = endTime - startTime
+                self.placeProcess(processID, worstFit)
+            # no suitable block found, process stays marked as not allocated (-1)
+        endTime = time.perf_counter_ns()
+        self.executionTimeNs = endTime - startTime
+        executionTime = self.executionTimeNs / 1e9
+        return executionTime
+
+    """
+    Implementation of First Fit Algorithm, using a SegmentTree of the free blocks instead of scanning every block
+
+    Args:
+        processesArr - list, array of process sizes
+
+    Returns:
+        executionTime - float, time execution took
+    """
+
+    def firstFitIndexedAllocation(self, processesArr):
+        # time the algorithm execution
+        startTime = time.perf_counter_ns()
+        self.resetProcesses(processesArr)
+        segmentTree = SegmentTree(self.freeBlocks)
+        for processID, processSize in enumerate(self.processSizes):
+            # first block large enough for process, starting at first block
+            blockID = segmentTree.firstFit(0, processSize)
+            self.blocksScanned += 1
+            if blockID is not None:
+                self.placeProcess(processID, blockID)
+                segmentTree.shrink(blockID, processSize)
+            # no suitable block found, process stays marked as not allocated (-1)
+        endTime = time.perf_counter_ns()
+        self.executionTimeNs = endTime - startTime
+        executionTime = self.executionTimeNs / 1e9
+        return executionTime
+
+    """
+    Implementation of Next Fit Algorithm, using a SegmentTree of the free blocks instead of scanning every block
+
+    Args:
+        processesArr - list, array of process sizes
+
+    Returns:
+        executionTime - float, time execution took
+    """
+
+    def nextFitIndexedAllocation(self, processesArr):
+        # time the algorithm execution
+        startTime = time.perf_counter_ns()
+        self.resetProcesses(processesArr)
+        segmentTree = SegmentTree(self.freeBlocks)
+        # keep track of last block allocated for next starting point
+        lastAllocated = 0
+        for processID, processSize in enumerate(self.processSizes):
+            # first block large enough for process, starting at last block allocated
+            blockID = segmentTree.firstFit(lastAllocated, processSize)
+            self.blocksScanned += 1
+            # wrap around to the first block
+            if blockID is None:
+                blockID = segmentTree.firstFit(0, processSize)
+                self.blocksScanned += 1
+            if blockID is not None:
+                self.placeProcess(processID, blockID)
+                segmentTree.shrink(blockID, processSize)
+                lastAllocated = blockID
+            # no suitable block found, process stays marked as not allocated (-1)
+        endTime = time.perf_counter_ns()
+        self.executionTimeNs = endTime - startTime
+        executionTime = self.executionTimeNs / 1e9
         return executionTime
 
     """
-    Calculates memory-related metrics (total memory, allocated memory, internal and external fragmentation)
+    Implementation of Best Fit Algorithm, using a SizeIndex of the free blocks instead of scanning every block
+
+    Args:
+        processesArr - list, array of process sizes
+
+    Returns:
+        executionTime - float, time execution took
+    """
+
+    def bestFitIndexedAllocation(self, processesArr):
+        # time the algorithm execution
+        startTime = time.perf_counter_ns()
+        self.resetProcesses(processesArr)
+        sizeIndex = SizeIndex(self.freeBlocks)
+        for processID, processSize in enumerate(self.processSizes):
+            # smallest block large enough for process
+            blockID = sizeIndex.smallestFit(processSize)
+            self.blocksScanned += 1
+            if blockID is not None:
+                self.placeProcess(processID, blockID)
+                sizeIndex.shrink(blockID, processSize)
+            # no suitable block found, process stays marked as not allocated (-1)
+        endTime = time.perf_counter_ns()
+        self.executionTimeNs = endTime - startTime
+        executionTime = self.executionTimeNs / 1e9
+        return executionTime
+
+    """
+    Implementation of Worst Fit Algorithm, using a SizeIndex of the free blocks instead of scanning every block
+
+    Args:
+        processesArr - list, array of process sizes
+
+    Returns:
+        executionTime - float, time execution took
+    """
+
+    def worstFitIndexedAllocation(self, processesArr):
+        # time the algorithm execution
+        startTime = time.perf_counter_ns()
+        self.resetProcesses(processesArr)
+        sizeIndex = SizeIndex(self.freeBlocks)
+        for processID, processSize in enumerate(self.processSizes):
+            # largest block, if large enough for process
+            blockID = sizeIndex.largestFit(processSize)
+            self.blocksScanned += 1
+            if blockID is not None:
+                self.placeProcess(processID, blockID)
+                sizeIndex.shrink(blockID, processSize)
+            # no suitable block found, process stays marked as not allocated (-1)
+        endTime = time.perf_counter_ns()
+        self.executionTimeNs = endTime - startTime
+        executionTime = self.executionTimeNs / 1e9
+        return executionTime
+
+    """
+    Implementation of the Binary Buddy System. The free memory of each block is kept as power of two chunks in a
+    BuddyHeap, each process is rounded up to the next power of two and given the lowest addressed free chunk of that
+    size, splitting a larger chunk in halves when there is none. The memory lost to rounding is kept in roundedSizes
+    and reported as internal fragmentation. The free chunks are the holes, a chunk next to a free chunk that is not its
+    buddy cannot be allocated together with it. Processes of size 0 take no chunk, they go to the first block as they
+    do with First Fit. Every process is placed in one pass so no chunk is freed here, DynamicAllocation's buddy
+    algorithm frees chunks and merges buddies
+
+    Args:
+        processesArr - list, array of process sizes
+
+    Returns:
+        executionTime - float, time execution took
+    """
+
+    def buddyAllocation(self, processesArr):
+        # time the algorithm execution
+        startTime = time.perf_counter_ns()
+        self.resetProcesses(processesArr)
+        # every block is free, the heap's address space is the blocks' address space
+        self.buddyHeap = buddyHeap = BuddyHeap(self.blockCapacity)
+        self.holeCount = sum(buddyHeap.freeCounts)
+        for processID, processSize in enumerate(self.processSizes):
+            if processSize == 0:
+                # nothing to round up, a chunk of the smallest order would be wasted
+                if self.blockCapacity:
+                    self.placeProcess(processID, 0)
+                continue
+            chunk = buddyHeap.allocate(processSize)
+            if chunk is not None:
+                address, order, splitOrder = chunk
+                # the chunk that was split is replaced by the upper halves given back to the heap
+                self.holeCount += splitOrder - order - 1
+                self.placeProcess(processID, buddyHeap.blockOf(address), 1 << order, address)
+            # no free chunk large enough, process stays marked as not allocated (-1)
+        # one bitmask lookup per process given a chunk or refused one
+        self.blocksScanned = buddyHeap.lookups
+        endTime = time.perf_counter_ns()
+        self.executionTimeNs = endTime - startTime
+        executionTime = self.executionTimeNs / 1e9
+        return executionTime
+
+    """
+    Implementation of Segregated Fit. Free blocks are kept in SizeClasses, one free list per power of two size class,
+    and each process is given the first block of the smallest class that is sure to fit it, so no list is scanned in
+    the common case. Process sizes seen more than once get a slab cache: a block with room for slabObjects processes
+    of that size is reserved, and later processes of the same size go straight to the slab's block. Slab room that is
+    still unused at the end is not counted as allocated
+
+    Args:
+        processesArr - list, array of process sizes
+        slabObjects - int, processes each slab holds, 0 or 1 turns slab caches off
+
+    Returns:
+        executionTime - float, time execution took
+    """
+
+    def segregatedFitAllocation(self, processesArr, slabObjects=8):
+        # time the algorithm execution
+        startTime = time.perf_counter_ns()
+        self.resetProcesses(processesArr)
+        # size classes track free memory not yet reserved by slabs
+        sizeClasses = SizeClasses(self.freeBlocks)
+        # process size -> [block number, processes the slab can still take]
+        slabs = {}
+        seenSizes = set()
+        for processID, processSize in enumerate(self.processSizes):
+            slab = slabs.get(processSize)
+            if slab is not None and slab[1] > 0:
+                # slab hit, the memory was already reserved
+                slab[1] -= 1
+                self.placeProcess(processID, slab[0])
+                self.blocksScanned += 1
+                continue
+            blockID = None
+            if slabObjects > 1 and processSize > 0 and processSize in seenSizes:
+                # repeated size, reserve a new slab for it
+                blockID = sizeClasses.find(processSize * slabObjects)
+                if blockID is not None:
+                    sizeClasses.shrink(blockID, processSize * slabObjects)
+                    slabs[processSize] = [blockID, slabObjects - 1]
+            seenSizes.add(processSize)
+            if blockID is None:
+                blockID = sizeClasses.find(processSize)
+                if blockID is not None:
+                    sizeClasses.shrink(blockID, processSize)
+            if blockID is not None:
+                self.placeProcess(processID, blockID)
+            # no suitable block found, process stays marked as not allocated (-1)
+        self.blocksScanned += sizeClasses.lookups
+        endTime = time.perf_counter_ns()
+        self.executionTimeNs = endTime - startTime
+        executionTime = self.executionTimeNs / 1e9
+        return executionTime
+
+    """
+    Memory-related metrics (total memory, allocated memory, internal and external fragmentation), read from running
+    totals and the largest hole. The free memory is split between the two fragmentation metrics, so no hole is counted
+    twice and their sum is at most totalMem plus roundingWaste:
+        internal fragmentation - free memory left in blocks that hold processes (each block's size minus the memory
+                                 allocated in it), plus roundingWaste, the memory given to processes beyond their sizes
+        external fragmentation - free memory in blocks that hold no process, except the largest hole when it is in
+                                 one of them, so the free memory no single process can use is counted once
+    The largest hole left out of external fragmentation is the lowest addressed one on ties, as in largestFreeHole()
 
     Returns:
         totalMem - total available memory for future allocations, sum of all free memory blocks
         allocatedMem - total memory that is currently in use by processes, sum of sizes of all allocated blocks 
         internalFragmentTotal - total memory currently internally fragmented, sum of differences between block sizes and allocation sizes
-        externalFragmentTotal - total memory currently externally fragmented, sum of leftover free block sizes
+        externalFragmentTotal - total memory currently externally fragmented, free memory of the blocks holding no
+                                process outside the largest hole
     """
 
     def metrics(self):
+        # memory given to processes beyond their sizes is internal fragmentation as well
+        internalFragmentTotal = self.occupiedFree + self.roundingWaste
+        # the rest of the free memory, less the largest hole if it is in a block holding no process
+        externalFragmentTotal = self.totalMem - self.occupiedFree
+        largestHole = self.largestFreeHole()
+        if largestHole is not None and self.blockProcessCounts[self.blockOf(largestHole[0])] == 0:
+            externalFragmentTotal -= largestHole[1]
+        metrics = (self.totalMem, self.allocatedMem, internalFragmentTotal, externalFragmentTotal)
+        if self.checkMetrics:
+            expected = self.recomputeMetrics()
+            if metrics != expected:
+                raise RuntimeError(f"running metrics {metrics} do not match recalculated metrics {expected}")
+        return metrics
+
+    """
+    Metrics and measurements for the last allocation, as reported for each algorithm by bestAlgorithm
+
+    Returns:
+        summary - dictionary, totalMem, allocatedMem, internalFragmentation, externalFragmentation, executionTime,
+                  executionTimeNs, blocksScanned, blocksScannedPerRequest, roundingWaste (part of internalFragmentation),
+                  largestHole, holeCount
+    """
+
+    def summary(self):
+        totalMem, allocatedMem, internalFragmentTotal, externalFragmentTotal = self.metrics()
+        requests = len(self.processSizes)
+        return {"totalMem": totalMem, "allocatedMem": allocatedMem,
+                "internalFragmentation": internalFragmentTotal,
+                "externalFragmentation": externalFragmentTotal, "executionTime": self.executionTimeNs / 1e9,
+                "executionTimeNs": self.executionTimeNs, "blocksScanned": self.blocksScanned,
+                "blocksScannedPerRequest": self.blocksScanned / requests if requests else 0.0,
+                "roundingWaste": self.roundingWaste, "largestHole": self.largestHole(), "holeCount": self.holeCount}
+
+    """
+    Calculates memory-related metrics from scratch, going through every block, process and hole
+
+    Returns:
+        totalMem, allocatedMem, internalFragmentTotal, externalFragmentTotal - as in metrics()
+    """
+
+    def recomputeMetrics(self):
         # total available memory for future allocations, sum of all free mem blocks
-        totalMem = sum(self.freeBlocks.values())
+        totalMem = sum(self.freeBlocks)
         # total memory in use, sum of sizes of allocated blocks
-        allocatedMem = sum([allocation[1] for allocation in self.allocations.values() if allocation])
-        internalFragmentTotal = 0  # total memory currently internal fragmentation
-        for processID, allocation in self.allocations.items():
-            # sum of differences between block sizes and allocation sizes
-            if allocation:
-                blockID, allocatedSize = allocation
-                fragment = self.freeBlocks[blockID] - allocatedSize
-                internalFragmentTotal += fragment
-        externalFragmentTotal = 0  # total memory currently external fragmentation
-        for blockId, blockSize in self.freeBlocks.items():
-            # sum of leftover free blocks sizes
-            externalFragmentTotal += blockSize
+        allocatedMem = 0
+        occupiedBlocks = set()
+        for processSize, blockID in zip(self.processSizes, self.processBlocks):
+            if blockID != -1:
+                allocatedMem += processSize
+                occupiedBlocks.add(blockID)
+        # sum of differences between block sizes and allocation sizes, for blocks holding processes
+        internalFragmentTotal = sum(self.freeBlocks[blockID] for blockID in occupiedBlocks)
+        # memory given to processes beyond their sizes
+        for processID, allocatedSize in self.roundedSizes.items():
+            internalFragmentTotal += allocatedSize - self.processSizes[processID]
+        # free memory in blocks holding no process, less the largest hole (lowest address on ties) if it is one of them
+        holes = self.freeHoles()
+        externalFragmentTotal = sum(size for start, size in holes if self.blockOf(start) not in occupiedBlocks)
+        largestHole = min(holes, key=lambda hole: (-hole[1], hole[0]), default=None)
+        if largestHole is not None and self.blockOf(largestHole[0]) not in occupiedBlocks:
+            externalFragmentTotal -= largestHole[1]
         return totalMem, allocatedMem, internalFragmentTotal, externalFragmentTotal
 
     """
@@ -233,67 +837,298 @@ class MemoryAllocation:
         freeBlocks - list, array of memory block sizes
         processes - list, array of process sizes
         determinant - str, what algorithms should be judged on
-                    could be: [totalMem, allocatedMem, internalFragmentation, externalFragmentation, executionTime]
+                    could be: [totalMem, allocatedMem, internalFragmentation, externalFragmentation, executionTime,
+                               executionTimeNs, blocksScanned, blocksScannedPerRequest, roundingWaste, holeCount]
+        engine - str, which allocation methods to run, key of MemoryAllocation.engines ("scan" or "indexed")
+        workers - int, number of worker processes to run the algorithms in, None runs them in this process
+        instrumentation - Instrumentation, optional cProfile/tracemalloc capture for each algorithm
 
     Returns:
         bestAlg - name of best suited algorithm
         results - dictionary, contains metrics for each algorithm
     """
 
-    def bestAlgorithm(self, freeBlocks, processes, determinant):
-        results = {}
-        for algName in ["first fit", "next fit", "best fit", "worst fit"]:
-            memoryAllocate = MemoryAllocation(
-                freeBlocks.copy())  # create new MemoryAllocation instance for each algorithm
-            # execute corresponding memory allocation algorithm and get information for
-            executionTime = getattr(memoryAllocate, f"{algName.lower().replace(' f', 'F')}Allocation")(processes.copy())
-            # calculate metrics for algorithm's performance
-            totalMem, allocatedMem, internalFragmentTotal, externalFragmentTotal = memoryAllocate.metrics()
+    def bestAlgorithm(self, freeBlocks, processes, determinant, engine="scan", workers=None, instrumentation=None):
+        return self.bestAlgorithms([(freeBlocks, processes)], determinant, engine, workers, instrumentation)[0]
+
+    """
+    Determines best algorithm for each of a list of scenarios, for given determinant
+
+    Args:
+        scenarios - list, (freeBlocks, processes) pairs of memory block sizes and process sizes
+        determinant - str, what algorithms should be judged on (see bestAlgorithm)
+        engine - str, which allocation methods to run, key of MemoryAllocation.engines ("scan" or "indexed")
+        workers - int, number of worker processes to run algorithms in, None runs them one after another in this process
+                  results are collected in scenario & algorithm order so they do not depend on workers
+        instrumentation - Instrumentation, optional cProfile/tracemalloc capture for each algorithm
+
+    Returns:
+        best - list, (bestAlg, results) for each scenario, as returned by bestAlgorithm
+    """
+
+    def bestAlgorithms(self, scenarios, determinant, engine="scan", workers=None, instrumentation=None):
+        if engine not in self.engines:
+            raise ValueError(f"unknown engine {engine!r}, expected one of {list(self.engines)}")
+        algorithms = self.engines[engine]
+        # one task per algorithm per scenario
+        if workers is None:
+            metrics = [runAlgorithm(freeBlocks, processes, methodName, instrumentation)
+                       for freeBlocks, processes in scenarios for methodName in algorithms.values()]
+        else:
+            # workers read the scenarios from shared memory, tasks only carry the store name and scenario number
+            with ScenarioStore(scenarios) as store, ProcessPoolExecutor(max_workers=workers) as executor:
+                tasks = [(store.name, scenarioIndex, methodName, instrumentation)
+                         for scenarioIndex in range(len(scenarios)) for methodName in algorithms.values()]
+                chunksize = max(1, len(tasks) // (4 * workers))
+                metrics = list(executor.map(runStoredAlgorithm, *zip(*tasks), chunksize=chunksize))
+
+        best = []
+        for i in range(len(scenarios)):
             # store results in results dictionary
-            results[algName] = {"totalMem": totalMem, "allocatedMem": allocatedMem,
-                                "internalFragmentation": internalFragmentTotal,
-                                "externalFragmentation": externalFragmentTotal, "executionTime": executionTime}
+            results = dict(zip(algorithms, metrics[i * len(algorithms):(i + 1) * len(algorithms)]))
+            # determine best algorithm based on given determinant
+            bestAlg = min(results, key=lambda x: results[x][determinant])
+            best.append((bestAlg, results))
+        return best
+
+    """
+    Ranks every algorithm on every determinant at once, each algorithm is run a single time so choosing the best
+    algorithm for any determinant afterwards is a lookup
+
+    Args:
+        freeBlocks - list, array of memory block sizes
+        processes - list, array of process sizes
+        weights - dictionary, weight of each determinant in the weighted ranking, None weighs every memoryDeterminants
+                  determinant equally
+        engine, workers, instrumentation - as in bestAlgorithm
+
+    Returns:
+        ranking - dictionary, with
+                  results - metrics of each algorithm, as returned by bestAlgorithm
+                  rankings - algorithm names from best to worst, for each determinant
+                  weighted - algorithm names from best to worst weighted score (see weightedRanking)
+                  pareto - algorithms that no other algorithm beats on every memoryDeterminants determinant (see
+                           paretoFront)
+    """
 
-        # determine best algorithm based on given determinant
-        bestAlg = min(results, key=lambda x: results[x][determinant])
-        return bestAlg, results
+    def rankAlgorithms(self, freeBlocks, processes, weights=None, engine="scan", workers=None, instrumentation=None):
+        results = self.bestAlgorithm(freeBlocks, processes, determinants[0], engine, workers, instrumentation)[1]
+        return rankResults(results, weights)
 
     """
-    Displays memory layout
+    Displays memory layout, lines are collected in a list and joined once so large layouts take linear time
+
+    Args:
+        offset - int, first block to show
+        limit - int, most blocks to show, None shows every block from offset
 
     Returns:
         out - str, representation of Memory Layout
     """
 
-    def memoryLayout(self):
-        out = "Memory Layout After Allocation:\n"
+    def memoryLayout(self, offset=0, limit=None):
+        end = pageEnd(offset, limit, len(self.freeBlocks))
+        lines = ["Memory Layout After Allocation:"]
         # for each block print its id and free memory size
-        for blockID, blockSize in self.freeBlocks.items():
-            out += f"Block {blockID}: {blockSize} KB free\n"
-
-        return out
+        for blockID in range(offset, end):
+            lines.append(f"Block {blockLabel(blockID)}: {self.freeBlocks[blockID]} KB free")
+        if offset > 0 or end < len(self.freeBlocks):
+            lines.append(pageNote(offset, end, len(self.freeBlocks), "blocks"))
+        return "\n".join(lines) + "\n"
 
     """
-    Displays memory layout and allocations
+    Displays memory layout and allocations, one page of blocks and processes at a time for large inputs
+
+    Args:
+        offset - int, first block and first process to show
+        limit - int, most blocks and processes to show, None shows every one from offset
 
     Returns:
         out - str, representation of allocation results
     """
 
-    def printResults(self):
-        # display memory layout
-        out = self.memoryLayout()
-
-        out += ("\nAllocations:")
-        for processID, allocation in self.allocations.items():
+    def printResults(self, offset=0, limit=None):
+        end = pageEnd(offset, limit, len(self.processSizes))
+        lines = ["Allocations:"]
+        for processID in range(offset, end):
             # for each process output its allocation
-            if allocation:
-                blockID, allocatedSize = allocation
-                out += f"\nProcess " + str(processID) + " allocated to Block " + str(blockID) + " (" + str(
-                    allocatedSize) + " KB)"
+            blockID = self.processBlocks[processID]
+            if blockID != -1:
+                line = f"Process {processLabel(processID)} allocated to Block {blockLabel(blockID)} " \
+                       f"({self.processSizes[processID]} KB)"
+                if processID in self.roundedSizes:
+                    line += f" in a {self.roundedSizes[processID]} KB chunk"
+                lines.append(line)
             else:
-                out += "\nProcess " + str(processID) + " could not be allocated."
-        return out
+                lines.append(f"Process {processLabel(processID)} could not be allocated.")
+        if offset > 0 or end < len(self.processSizes):
+            lines.append(pageNote(offset, end, len(self.processSizes), "processes"))
+        # display memory layout
+        return self.memoryLayout(offset, limit) + "\n" + "\n".join(lines)
+
+
+"""
+End of a page of entries
+
+Args:
+    offset - int, first entry on the page
+    limit - int, most entries on a page, None for no limit
+    total - int, number of entries
+
+Returns:
+    end - int, one past the last entry on the page
+"""
+
+
+def pageEnd(offset, limit, total):
+    return total if limit is None else max(offset, min(offset + limit, total))
+
+
+"""
+Line telling which entries a page shows
+
+Args:
+    offset - int, first entry on the page
+    end - int, one past the last entry on the page
+    total - int, number of entries
+    name - str, what the entries are
+
+Returns:
+    note - str
+"""
+
+
+def pageNote(offset, end, total, name):
+    if end <= offset:
+        return f"(no {name} on this page, {total} in total)"
+    return f"({name} {offset + 1}-{end} of {total} shown)"
+
+
+"""
+Run one allocation algorithm on a fresh MemoryAllocation, module level so it can be sent to worker processes
+
+Args:
+    freeBlocks - list, array of memory block sizes
+    processes - list, array of process sizes
+    methodName - str, name of MemoryAllocation allocation method to run
+    instrumentation - Instrumentation, optional cProfile/tracemalloc capture, None for timing and counters only
+
+Returns:
+    metrics - dictionary, metrics for the algorithm (totalMem, allocatedMem, internalFragmentation, externalFragmentation,
+              executionTime, executionTimeNs, blocksScanned, blocksScannedPerRequest, plus profile and peakMemory
+              when instrumentation captures them)
+"""
+
+
+def runAlgorithm(freeBlocks, processes, methodName, instrumentation=None):
+    # create new MemoryAllocation instance for each algorithm, it keeps its own copy of the block sizes
+    memoryAllocate = MemoryAllocation(freeBlocks)
+    # execute corresponding memory allocation algorithm and get information for
+    allocate = getattr(memoryAllocate, methodName)
+    if instrumentation is None:
+        allocate(processes)
+        report = {}
+    else:
+        report = instrumentation.run(allocate, processes)[1]
+        # executionTime already times the algorithm itself, without profiling overhead
+        del report["wallTimeNs"]
+    # calculate metrics for algorithm's performance
+    return {**memoryAllocate.summary(), **report}
+
+
+"""
+Run one allocation algorithm on a scenario from a ScenarioStore, in a worker process. The block and process sizes are
+read from shared memory, only the remaining block sizes are copied
+
+Args:
+    storeName - str, name of the ScenarioStore
+    scenarioIndex - int, scenario number in the store
+    methodName - str, name of MemoryAllocation allocation method to run
+    instrumentation - Instrumentation, optional cProfile/tracemalloc capture
+
+Returns:
+    metrics - dictionary, as returned by runAlgorithm
+"""
+
+
+def runStoredAlgorithm(storeName, scenarioIndex, methodName, instrumentation=None):
+    freeBlocks, processes = attachStore(storeName).scenario(scenarioIndex)
+    return runAlgorithm(freeBlocks, processes, methodName, instrumentation)
+
+
+"""
+Rank algorithms from their metrics, on every determinant, by weighted score and by Pareto front
+
+Args:
+    results - dictionary, metrics of each algorithm, as returned by bestAlgorithm
+    weights - dictionary, weight of each determinant in the weighted ranking, None weighs every determinant equally
+
+Returns:
+    ranking - dictionary, results, rankings, weighted and pareto (see MemoryAllocation.rankAlgorithms)
+"""
+
+
+def rankResults(results, weights=None):
+    # sorted() is stable, so ties keep the algorithm order like min() in bestAlgorithm
+    rankings = {determinant: sorted(results, key=lambda x: results[x][determinant]) for determinant in determinants}
+    return {"results": results, "rankings": rankings, "weighted": weightedRanking(results, weights),
+            "pareto": paretoFront(results)}
+
+
+"""
+Rank algorithms by a weighted sum of their metrics. Each metric is scaled to 0 (best algorithm) .. 1 (worst algorithm)
+first, so metrics measured in KB and in seconds can be added. executionTime is left out unless it is given a weight,
+scaled timing noise alone would reorder algorithms whose memory metrics are close
+
+Args:
+    results - dictionary, metrics of each algorithm
+    weights - dictionary, weight of each determinant, None weighs every memoryDeterminants determinant equally
+
+Returns:
+    ranked - list, (algorithm name, score) from lowest (best) to highest score
+"""
+
+
+def weightedRanking(results, weights=None):
+    if weights is None:
+        weights = dict.fromkeys(memoryDeterminants, 1)
+    scores = dict.fromkeys(results, 0.0)
+    for determinant, weight in weights.items():
+        values = [metrics[determinant] for metrics in results.values()]
+        low, high = min(values), max(values)
+        if high == low:
+            continue
+        for algName, metrics in results.items():
+            scores[algName] += weight * (metrics[determinant] - low) / (high - low)
+    return sorted(scores.items(), key=lambda item: item[1])
+
+
+"""
+Find the algorithms on the Pareto front, those that no other algorithm is at least as good as on every determinant
+and better on one
+
+Args:
+    results - dictionary, metrics of each algorithm
+    metricNames - list, determinants to compare on, memoryDeterminants by default (with executionTime, timing noise
+                  decides which algorithms are on the front)
+
+Returns:
+    front - list, names of algorithms on the Pareto front, in algorithm order
+"""
+
+
+def paretoFront(results, metricNames=memoryDeterminants):
+    front = []
+    for algName, metrics in results.items():
+        dominated = False
+        for otherName, other in results.items():
+            if otherName != algName and all(other[m] <= metrics[m] for m in metricNames) and \
+                    any(other[m] < metrics[m] for m in metricNames):
+                dominated = True
+                break
+        if not dominated:
+            front.append(algName)
+    return front
 
 
 if __name__ == "__main__":
@@ -308,31 +1143,15 @@ if __name__ == "__main__":
     for algorithmName, metrics in results.items():
         print(
             f"{algorithmName}: Total Available Memory={metrics['totalMem']} KB, Allocated Memory in Use={metrics['allocatedMem']} KB, External Fragmentation={metrics['externalFragmentation']} KB, Internal Fragmentation={metrics['internalFragmentation']} KB, Execution Time = {metrics['executionTime']}")
-# Example usage:
-if __name__ == "__main__":
-    freeBlocksExample = [50, 150, 300, 350, 600]
-    processesExample = [300, 24, 125, 50]
-
-    memoryAllocator = MemoryAllocation(freeBlocksExample)
-
-    print("First Fit Algorithm:")
-    memoryAllocator.firstFitAllocation(processesExample)
-    memoryAllocator.printResults()
-    memoryAllocator.memoryLayout()
-
-    print("\nNext Fit Algorithm:")
-    memoryAllocator.nextFitAllocation(processesExample)
-    memoryAllocator.printResults()
-    memoryAllocator.memoryLayout()
-
-    print("\nBest Fit Algorithm:")
-    memoryAllocator = MemoryAllocation(freeBlocksExample)  # Reset for Best Fit
-    memoryAllocator.bestFitAllocation(processesExample)
-    memoryAllocator.printResults()
-    memoryAllocator.memoryLayout()
-
-    print("\nWorst Fit Algorithm:")
-    memoryAllocator = MemoryAllocation(freeBlocksExample)  # Reset for Worst Fit
-    memoryAllocator.worstFitAllocation(processesExample)
-    memoryAllocator.printResults()
-    memoryAllocator.memoryLayout()
+
+    # allocations of each algorithm, every algorithm in turn on the same MemoryAllocation, checked against a fresh one
+    memoryAllocator = MemoryAllocation(freeBlocksExample, checkMetrics=True)
+    for algorithmName, methodName in MemoryAllocation.engines["scan"].items():
+        getattr(memoryAllocator, methodName)(processExample)
+        freshAllocator = MemoryAllocation(freeBlocksExample)
+        getattr(freshAllocator, methodName)(processExample)
+        if (memoryAllocator.metrics() != freshAllocator.metrics() or
+                memoryAllocator.freeHoles() != freshAllocator.freeHoles()):
+            raise RuntimeError(f"{algorithmName} run after other algorithms does not match a fresh run")
+        print(f"\n{algorithmName.title()} Algorithm:")
+        print(memoryAllocator.printResults())
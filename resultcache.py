@@ -0,0 +1,113 @@
+import threading
+from collections import OrderedDict
+
+from memallocation import MemoryAllocation
+
+"""
+Class ResultCache
+Least recently used cache of finished simulations, so the GUI buttons do not rerun an algorithm for inputs they have
+already seen. formatOutput, furtherAllocationInformation and createDiagram all read from the same cache, so clicking
+"Calculate!" then asking for an algorithm's allocations or diagram runs each algorithm once.
+
+Attributes:
+    maxSize - int, most entries kept, the least recently used entry is evicted past this
+    entries - OrderedDict, cached values, least recently used first
+    hits, misses - int, number of lookups that found / did not find their key
+
+Methods:
+    get(key) - returns cached value (marking it most recently used), None if not cached
+    put(key, value) - caches value, evicting the least recently used entry if the cache is full
+    clear() - removes every entry
+
+Functions:
+    simulate(blocks, processes, algName, engine) - returns a MemoryAllocation that has run algName, from the cache if possible
+"""
+
+
+class ResultCache:
+    """
+    Initialize an empty ResultCache
+
+    Args:
+        maxSize - int, most entries kept
+    """
+
+    def __init__(self, maxSize=128):
+        self.maxSize = maxSize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # gradio runs handlers in several threads
+        self.lock = threading.Lock()
+
+    """
+    Look up a cached value
+
+    Args:
+        key - hashable, cache key
+
+    Returns:
+        value - cached value, None if key is not cached
+    """
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return value
+
+    """
+    Cache a value
+
+    Args:
+        key - hashable, cache key
+        value - value to cache
+    """
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxSize:
+                self.entries.popitem(last=False)
+
+    """
+    Remove every entry
+    """
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+simulationCache = ResultCache()
+
+"""
+Run an algorithm, or reuse the result of an earlier identical run
+
+Args:
+    blocks - list, array of memory block sizes
+    processes - list, array of process sizes
+    algName - str, algorithm name, any capitalization ("First Fit" or "first fit")
+    engine - str, key of MemoryAllocation.engines
+
+Returns:
+    memoryAllocator - MemoryAllocation after running the algorithm, shared with other callers so it must not be changed
+"""
+
+
+def simulate(blocks, processes, algName, engine="scan"):
+    if algName is None or algName.lower() not in MemoryAllocation.engines[engine]:
+        raise ValueError(f"unknown algorithm {algName!r}, expected one of {list(MemoryAllocation.engines[engine])}")
+    # normalized key, the same sizes typed differently share one entry
+    key = (tuple(blocks), tuple(processes), algName.lower(), engine)
+    memoryAllocator = simulationCache.get(key)
+    if memoryAllocator is None:
+        memoryAllocator = MemoryAllocation(blocks)
+        getattr(memoryAllocator, MemoryAllocation.engines[engine][algName.lower()])(processes)
+        simulationCache.put(key, memoryAllocator)
+    return memoryAllocator
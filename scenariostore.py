@@ -0,0 +1,154 @@
+from array import array
+from multiprocessing import shared_memory
+
+"""
+Class ScenarioStore
+Block and process sizes of many scenarios in one block of shared memory (multiprocessing.shared_memory), so worker
+processes read them in place instead of each receiving a pickled copy
+
+Every value is an 8 byte integer, like the array('q') arrays of MemoryAllocation. The memory holds the number of
+scenarios n, then 2n + 1 offsets (where each scenario's block sizes and process sizes start, and where the data ends),
+then the data. scenario(i) returns memoryviews into the shared memory, no values are copied; MemoryAllocation keeps
+such views as its blockCapacity and processSizes and only copies the remaining sizes (freeBlocks), which every
+algorithm changes.
+
+The process that creates a store owns it and must unlink() it (or use it in a with statement) when the sweep is done.
+Workers attach with attachStore(name), which keeps the last store each worker attached to open for the next task.
+
+Attributes:
+    name - str, name of the shared memory, used to attach from other processes
+    values - memoryview, the shared memory as 8 byte integers
+
+Methods:
+    scenario(scenarioIndex) - returns (blocks, processes) memoryviews of one scenario
+    close() - releases this process's views of the shared memory
+    unlink() - closes and frees the shared memory, only for the creating process
+
+Functions:
+    attachStore(name) - attaches to a store created by another process, reusing the last attached store
+"""
+
+
+class ScenarioStore:
+    """
+    Create a store holding scenarios, or attach to one created by another process
+
+    Args:
+        scenarios - list, (blocks, processes) pairs of memory block sizes and process sizes, to create a new store
+        name - str, name of an existing store to attach to, instead of scenarios
+    """
+
+    def __init__(self, scenarios=None, name=None):
+        if name is None:
+            offsets = array('q')
+            size = 0
+            for blocks, processes in scenarios:
+                offsets.append(size)
+                size += len(blocks)
+                offsets.append(size)
+                size += len(processes)
+            offsets.append(size)
+            self.header = 1 + len(offsets)
+            self.shm = shared_memory.SharedMemory(create=True, size=8 * (self.header + size))
+            self.owner = True
+            self.values = self.shm.buf.cast('q')
+            self.values[0] = len(scenarios)
+            self.values[1:self.header] = offsets
+            data = self.header
+            for blocks, processes in scenarios:
+                self.values[data:data + len(blocks)] = array('q', blocks)
+                data += len(blocks)
+                self.values[data:data + len(processes)] = array('q', processes)
+                data += len(processes)
+        else:
+            # workers share the creating process's resource tracker, so attaching does not free the memory on exit
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+            self.values = self.shm.buf.cast('q')
+            self.header = 1 + 2 * self.values[0] + 1
+        self.name = self.shm.name
+
+    """
+    Number of scenarios in the store
+    """
+
+    def __len__(self):
+        return self.values[0]
+
+    """
+    Read one scenario without copying it
+
+    Args:
+        scenarioIndex - int, position of scenario in the list the store was created from
+
+    Returns:
+        blocks - memoryview, memory block sizes (8 byte integers, read only by convention)
+        processes - memoryview, process sizes
+    """
+
+    def scenario(self, scenarioIndex):
+        if not 0 <= scenarioIndex < len(self):
+            raise IndexError(f"scenario {scenarioIndex} is not in a store of {len(self)} scenarios")
+        blocksStart, processesStart, end = self.values[1 + 2 * scenarioIndex:4 + 2 * scenarioIndex]
+        return (self.values[self.header + blocksStart:self.header + processesStart],
+                self.values[self.header + processesStart:self.header + end])
+
+    """
+    Release this process's views of the shared memory, every view returned by scenario() must be gone first
+    """
+
+    def close(self):
+        if self.values is not None:
+            self.values.release()
+            self.values = None
+            self.shm.close()
+
+    """
+    Close and free the shared memory, called by the process that created the store
+    """
+
+    def unlink(self):
+        self.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def __del__(self):
+        # the views must be released before the shared memory closes itself
+        try:
+            if hasattr(self, "values"):
+                self.close()
+        except BufferError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.unlink()
+
+
+attachedStore = None
+
+"""
+Attach to a store created by another process, each worker keeps the store it attached to last so every task of a
+sweep reuses it
+
+Args:
+    name - str, name of the store
+
+Returns:
+    store - ScenarioStore
+"""
+
+
+def attachStore(name):
+    global attachedStore
+    if attachedStore is None or attachedStore.name != name:
+        if attachedStore is not None:
+            try:
+                attachedStore.close()
+            except BufferError:
+                # views of the old store are still in use, it is closed once they are garbage collected
+                pass
+        attachedStore = ScenarioStore(name=name)
+    return attachedStore
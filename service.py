@@ -0,0 +1,548 @@
+import asyncio
+import io
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from memallocation import MemoryAllocation, blockLabel, determinants, pageEnd, processLabel, rankResults
+from resultcache import simulate
+from tracereader import parseSizes
+
+"""
+Service layer shared by the GUI entry points (memgui.py, app.py) and the command line (cli.py)
+
+Importing this module only loads the allocation code. matplotlib (diagrams), PIL and gradio (GUI) are imported the
+first time they are needed, so scripts and batch jobs that only run simulations start quickly.
+
+CPU heavy work (running the algorithms, drawing diagrams) for the GUI is sent to worker processes so one large
+request does not block other users, and the Gradio queue limits how many requests of each event run at once.
+Settings are read from environment variables so a hosted Space can tune them without code changes:
+    MEMALLOC_WORKERS - worker processes (default: number of CPUs)
+    MEMALLOC_CONCURRENCY - requests of each event that may run at once (default: number of workers)
+    MEMALLOC_QUEUE_SIZE - most requests waiting in the queue before new ones are turned away (default 64)
+    MEMALLOC_TIMEOUT - seconds a request may wait and run before it fails and its worker is stopped (default 30)
+    MEMALLOC_MAX_ITEMS - most memory blocks or processes in one request (default 100000)
+    MEMALLOC_PAGE_SIZE - memory blocks and processes shown per page of allocations (default 500)
+
+Each worker is a pool of one process with its own resultcache. Every offloaded function takes the block sizes, process
+sizes and algorithm first, and a hash of them picks the worker, so the metrics, allocations and diagram of one
+algorithm on one input all run on the worker that has already cached that simulation, while different algorithms are
+spread over the workers. A request that runs past the timeout (or is cancelled while running) has its worker process
+terminated and replaced, so an oversized request does not keep a worker busy after it has failed; requests that were
+waiting on that worker are sent to the replacement. A worker that dies by itself (killed for using too much memory,
+crashed) is replaced the same way the next time it is used.
+
+Handlers stream their output: the metrics handler is an async generator that sends each algorithm to the pool on its
+own and yields the metrics of every algorithm finished so far, so the first results show while slower algorithms
+still run, and allocations are shown one page at a time, formatted in the worker so only the page is sent back.
+Output text is built from lists of lines joined once, so it takes time linear in its length.
+
+Functions:
+    checkedSizes(text, name) - parses sizes typed by the user, rejecting negative sizes and inputs larger than
+                               maxInputItems
+    summarizeAlgorithm(blocks, processes, algName) - runs one algorithm, returns its summary()
+    summarizeAlgorithms(blocks, processes) - runs every algorithm, returns each one's summary()
+    formatAlgorithmMetrics(algName, metrics) - string output of one algorithm's metrics
+    formatMetrics(bestAlg, results) - string output of every algorithm's metrics
+    formatRankings(ranking) - string output of the rankings from memallocation.rankResults
+    formatAllocations(memoryAllocator, page, pageSize) - string output of one algorithm's allocations, one page at a time
+    allocationPage(blocks, processes, algorithm, page) - runs an algorithm and formats one page of its allocations
+    diagramPng(blocks, processes, algorithm) - runs an algorithm and returns its diagram as PNG bytes
+    workerFor(blocks, processes, algorithm) - returns the number of the worker for an algorithm and input
+    startWorker(workerID) - starts a worker, recording its process id
+    dropWorker(workerID, executor) - forgets a worker that has stopped, it is replaced on its next use
+    stopWorker(workerID) - terminates a worker process, it is replaced on its next use
+    offload(function, blocks, processes, algorithm, *args) - runs function in the worker for its input, failing and
+                                                              stopping the worker after requestTimeout seconds
+    formatOutput, furtherAllocationInformation, createDiagram - GUI button handlers (the first two are async generators)
+    buildDemo(footer) - builds the Gradio GUI
+    launch(demo) - starts the GUI with the request queue enabled
+"""
+
+workerCount = int(os.environ.get("MEMALLOC_WORKERS", os.cpu_count() or 1))
+concurrencyLimit = int(os.environ.get("MEMALLOC_CONCURRENCY", workerCount))
+maxQueueSize = int(os.environ.get("MEMALLOC_QUEUE_SIZE", 64))
+requestTimeout = float(os.environ.get("MEMALLOC_TIMEOUT", 30))
+maxInputItems = int(os.environ.get("MEMALLOC_MAX_ITEMS", 100000))
+pageSize = int(os.environ.get("MEMALLOC_PAGE_SIZE", 500))
+# times a request is sent to a new worker after its worker stopped, before it fails
+maxAttempts = 3
+
+algorithmChoices = ["First Fit", "Next Fit", "Best Fit", "Worst Fit", "Buddy", "Segregated Fit"]
+
+# one single process pool per worker, created on first use, and a future of each worker's process id
+workers = [None] * max(1, workerCount)
+workerPids = [None] * len(workers)
+
+"""
+Parse sizes typed by the user, rejecting negative sizes and enforcing the input size limit
+
+Args:
+    text - str, sizes separated by commas, optionally within []
+    name - str, what the sizes are, used in error messages
+
+Returns:
+    sizes - list, int sizes
+"""
+
+
+def checkedSizes(text, name):
+    try:
+        sizes = parseSizes(text)
+    except ValueError as error:
+        raise ValueError(f"List of {name} must be whole numbers of 0 or more separated by commas, {error}")
+    if len(sizes) > maxInputItems:
+        raise ValueError(f"List of {name} has {len(sizes)} entries, the limit is {maxInputItems}")
+    return sizes
+
+
+"""
+Run one algorithm, module level so it can be sent to a worker process
+
+Args:
+    blocks - list, array of memory block sizes
+    processes - list, array of process sizes
+    algName - str, algorithm name, key of MemoryAllocation.engines["scan"]
+
+Returns:
+    metrics - dictionary, summary() of the algorithm
+"""
+
+
+def summarizeAlgorithm(blocks, processes, algName):
+    return simulate(blocks, processes, algName).summary()
+
+
+"""
+Run every algorithm on the same input
+
+Args:
+    blocks - list, array of memory block sizes
+    processes - list, array of process sizes
+
+Returns:
+    results - dictionary, summary() of each algorithm, by algorithm name
+"""
+
+
+def summarizeAlgorithms(blocks, processes):
+    return {algName: summarizeAlgorithm(blocks, processes, algName) for algName in MemoryAllocation.engines["scan"]}
+
+
+"""
+format string output of one algorithm's metrics
+
+Args:
+    algName - str, algorithm name
+    metrics - dictionary, summary() of the algorithm
+
+Returns:
+    out - string containing the algorithm's metrics
+"""
+
+
+def formatAlgorithmMetrics(algName, metrics):
+    return (f"{algName.upper()}: \n\tTotal Available Memory={metrics['totalMem']} KB, "
+            f"\n\tAllocated Memory in Use={metrics['allocatedMem']} KB, "
+            f"\n\tExternal Fragmentation={metrics['externalFragmentation']} KB, "
+            f"\n\tInternal Fragmentation={metrics['internalFragmentation']} KB, "
+            f"\n\tExecution Time = {metrics['executionTime']}, "
+            f"\n\tBlocks Scanned per Process = {metrics['blocksScannedPerRequest']}\n")
+
+
+"""
+format string output containing all necessary calculations
+
+Args:
+    bestAlg - str, name of best algorithm
+    results - dictionary, summary() of each algorithm, by algorithm name
+
+Returns:
+    out - string containing all metrics information
+"""
+
+
+def formatMetrics(bestAlg, results):
+    parts = [f"The best memory allocation algorithm is: {bestAlg}", "\n\nAlgorithm Metrics:\n"]
+    parts.extend(formatAlgorithmMetrics(algorithmName, metrics) for algorithmName, metrics in results.items())
+    return "".join(parts)
+
+
+"""
+format string output of the algorithm rankings
+
+Args:
+    ranking - dictionary, from memallocation.rankResults
+
+Returns:
+    out - string containing the ranking on every determinant, the weighted ranking and the Pareto front
+"""
+
+
+def formatRankings(ranking):
+    lines = ["\nRankings (best first):"]
+    for determinant, ranked in ranking["rankings"].items():
+        lines.append(f"\t{determinant}: " + ", ".join(ranked))
+    lines.append("\tWeighted (memory determinants equal, execution time left out): " +
+                 ", ".join(f"{algName} ({score:.2f})" for algName, score in ranking["weighted"]))
+    lines.append("\tPareto front: " + ", ".join(ranking["pareto"]))
+    return "\n".join(lines) + "\n"
+
+
+"""
+format string output containing for extra allocation information, one page of blocks and processes at a time
+
+Args:
+    memoryAllocator - MemoryAllocation, after running an allocation algorithm
+    page - int, page to show, starting at 1
+    pageSize - int, blocks and processes per page, None shows everything on one page
+
+Returns:
+    outputStr - string containing all additional allocation information
+"""
+
+
+def formatAllocations(memoryAllocator, page=1, pageSize=None):
+    offset = 0 if pageSize is None else (page - 1) * pageSize
+    processEnd = pageEnd(offset, pageSize, len(memoryAllocator.processSizes))
+    blockEnd = pageEnd(offset, pageSize, len(memoryAllocator.blockCapacity))
+    outProcesses = "Processes: " + str([(processLabel(processID), memoryAllocator.processSizes[processID])
+                                        for processID in range(offset, processEnd)])
+    outBlocks = "Memory Blocks: " + str([(blockLabel(blockID), memoryAllocator.blockCapacity[blockID])
+                                         for blockID in range(offset, blockEnd)])
+    out2 = memoryAllocator.printResults(offset, pageSize)
+
+    outputStr = outProcesses + "\n" + outBlocks + "\n\n" + out2
+    return outputStr
+
+
+"""
+Run an algorithm and format one page of its allocations, in a worker process so only the page is sent back
+
+Args:
+    blocks - list, array of memory block sizes
+    processes - list, array of process sizes
+    algorithm - str, algorithm name
+    page - int, page to show, starting at 1
+
+Returns:
+    outputStr - string, as returned by formatAllocations
+"""
+
+
+def allocationPage(blocks, processes, algorithm, page):
+    return formatAllocations(simulate(blocks, processes, algorithm), page, pageSize)
+
+
+"""
+Run an algorithm and draw its diagram
+
+Args:
+    blocks - list, array of memory block sizes
+    processes - list, array of process sizes
+    algorithm - str, algorithm name
+
+Returns:
+    png - bytes, PNG image of the diagram
+"""
+
+
+def diagramPng(blocks, processes, algorithm):
+    # matplotlib is only loaded once a diagram is drawn
+    from diagram import renderDiagram
+    memoryAllocator = simulate(blocks, processes, algorithm)
+    return renderDiagram(memoryAllocator, f'Memory Block Allocations: {algorithm}').getvalue()
+
+
+"""
+Pick the worker for an algorithm and input, the same one every time so its resultcache is reused
+
+Args:
+    blocks - list, array of memory block sizes
+    processes - list, array of process sizes
+    algorithm - str, algorithm name, any capitalization
+
+Returns:
+    workerID - int, index into workers
+"""
+
+
+def workerFor(blocks, processes, algorithm):
+    # the same key as resultcache.simulate, without the engine
+    return hash((tuple(blocks), tuple(processes), str(algorithm).lower())) % len(workers)
+
+
+"""
+Start a worker, a pool of one process. Its first task reports the process id, so the process can be stopped later
+without reaching into the pool
+
+Args:
+    workerID - int, index into workers
+
+Returns:
+    executor - ProcessPoolExecutor, the new worker
+"""
+
+
+def startWorker(workerID):
+    executor = ProcessPoolExecutor(max_workers=1)
+    workers[workerID] = executor
+    workerPids[workerID] = executor.submit(os.getpid)
+    return executor
+
+
+"""
+Forget a worker whose process has stopped (BrokenProcessPool), unless it has already been replaced
+
+Args:
+    workerID - int, index into workers
+    executor - ProcessPoolExecutor, the worker that stopped
+"""
+
+
+def dropWorker(workerID, executor):
+    if workers[workerID] is executor:
+        workers[workerID] = None
+        workerPids[workerID] = None
+    executor.shutdown(wait=False)
+
+
+"""
+Stop a worker's process, whatever it is running. The pool has no way to stop a running task, so its process is
+terminated; tasks waiting on it fail with BrokenProcessPool and a new pool is created on the worker's next use
+
+Args:
+    workerID - int, index into workers
+"""
+
+
+def stopWorker(workerID):
+    executor = workers[workerID]
+    if executor is None:
+        return
+    pid = workerPids[workerID]
+    dropWorker(workerID, executor)
+    # the process id is known once the worker has run its first task, always before it runs a request
+    if pid is not None and pid.done() and pid.exception() is None:
+        try:
+            os.kill(pid.result(), signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+
+"""
+Run a function in the worker for its input without blocking the event loop. If it runs past requestTimeout seconds
+(waiting included) or the caller is cancelled while it runs, the worker is stopped so it does not go on working for a
+request that has already failed
+
+Args:
+    function - callable, module level function (it is sent to a worker process) taking blocks, processes and
+               algorithm first
+    blocks - list, array of memory block sizes
+    processes - list, array of process sizes
+    algorithm - str, algorithm name
+    args - further arguments for function
+
+Returns:
+    value - return value of function
+"""
+
+
+async def offload(function, blocks, processes, algorithm, *args):
+    workerID = workerFor(blocks, processes, algorithm)
+    deadline = asyncio.get_running_loop().time() + requestTimeout
+    for attempt in range(maxAttempts):
+        executor = workers[workerID] or startWorker(workerID)
+        try:
+            future = executor.submit(function, blocks, processes, algorithm, *args)
+        except BrokenProcessPool:
+            # the worker died by itself since it was last used
+            dropWorker(workerID, executor)
+            continue
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), deadline - asyncio.get_running_loop().time())
+        except BrokenProcessPool:
+            # the worker was stopped by another request or died while this one was waiting on it or running, try again
+            # on a new one
+            dropWorker(workerID, executor)
+            if asyncio.get_running_loop().time() >= deadline:
+                raise TimeoutError(f"Request took longer than {requestTimeout:g} seconds, try a smaller input")
+        except (asyncio.TimeoutError, asyncio.CancelledError) as error:
+            # a task that has not started is just dropped, a running one can only be stopped with its worker
+            if not future.cancel():
+                stopWorker(workerID)
+            if isinstance(error, asyncio.TimeoutError):
+                raise TimeoutError(f"Request took longer than {requestTimeout:g} seconds, try a smaller input")
+            raise
+    raise RuntimeError(f"The worker stopped {maxAttempts} times running this request, try a smaller input")
+
+
+"""
+GUI handler, metrics of every algorithm and the best one for the chosen determinant, streamed as algorithms finish
+
+Args:
+    blocks - str, user input list of memory block sizes
+    processes - str, user input list of process sizes
+    determinant - str, user input choice of determinant factor
+
+Yields:
+    out - string to be output to GUI window, the metrics of every algorithm finished so far, then all metrics
+          information once every algorithm has finished
+"""
+
+
+async def formatOutput(blocks, processes, determinant):
+    freeBlocks = checkedSizes(blocks, "memory block sizes")
+    processArr = checkedSizes(processes, "process sizes")
+    algNames = list(MemoryAllocation.engines["scan"])
+    # every algorithm runs on its own worker, each run is cached there for the allocations and diagram buttons
+    tasks = {asyncio.ensure_future(offload(summarizeAlgorithm, freeBlocks, processArr, algName)): algName
+             for algName in algNames}
+    results = {}
+    try:
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                results[tasks[task]] = task.result()
+            if pending:
+                finished = [formatAlgorithmMetrics(algName, results[algName]) for algName in algNames if algName in results]
+                running = ", ".join(algName for algName in algNames if algName not in results)
+                yield f"Finished {len(results)} of {len(algNames)} algorithms, still running: {running}\n\n" + "".join(finished)
+    finally:
+        # a failed algorithm or a closed page stops the rest, and the workers still running them
+        for task in tasks:
+            task.cancel()
+    results = {algName: results[algName] for algName in algNames}
+    # every determinant is ranked from the same runs, the chosen one is a lookup
+    ranking = rankResults(results)
+    bestAlg = ranking["rankings"][determinant][0]
+    yield formatMetrics(bestAlg, results) + formatRankings(ranking)
+
+
+"""
+GUI handler, allocations of one algorithm, one page of pageSize blocks and processes at a time
+
+Args:
+    blocks - str, user input list of memory block sizes
+    processes - str, user input list of process sizes
+    algorithm - str, user input choice of algorithm
+    page - int, user input page number, starting at 1
+
+Yields:
+    outputStr - string to be output to GUI window, a progress message and then all additional allocation information
+                for the page
+"""
+
+
+async def furtherAllocationInformation(blocks, processes, algorithm, page=1):
+    freeBlocks = checkedSizes(blocks, "memory block sizes")
+    processArr = checkedSizes(processes, "process sizes")
+    page = max(1, int(page or 1))
+    yield f"Running {algorithm}..."
+    yield await offload(allocationPage, freeBlocks, processArr, algorithm, page)
+
+
+"""
+GUI handler, create the diagram of the memory blocks and process allocations
+
+Returns:
+    image of diagram, rendered in memory so concurrent requests do not share a file
+"""
+
+
+async def createDiagram(blocks, processes, algorithm):
+    from PIL import Image
+    # run memoryAllocator and draw the diagram in the worker pool
+    png = await offload(diagramPng, checkedSizes(blocks, "memory block sizes"),
+                        checkedSizes(processes, "process sizes"), algorithm)
+    return Image.open(io.BytesIO(png))
+
+
+"""
+Create GUI from Gradio Library
+    https://github.com/gradio-app/gradio
+
+Args:
+    footer - str, markdown shown at the bottom of the window
+
+Returns:
+    demo - gradio Blocks app
+"""
+
+
+def buildDemo(footer):
+    # gradio is only loaded when a GUI is built
+    import gradio as gr
+
+    with gr.Blocks() as demo:
+        gr.Markdown("Determine the best memory allocation algorithm.")
+        with gr.Row():
+            gr.Label("First Fit")
+            gr.Label("Next Fit")
+            gr.Label("Best Fit")
+            gr.Label("Worst Fit")
+            gr.Label("Buddy")
+            gr.Label("Segregated Fit")
+
+        # input for memory block sizes array
+        freeBlocks = gr.Textbox(
+            value="[50,150,300,350,600]",  # example from class
+            label="List of Memory Block Sizes, formatted as an array, contained within [], seperated by commas",
+            interactive=True  # can be changed for other examples
+        )
+
+        # input for processes sizes array
+        processesArray = gr.Textbox(
+            value="[300,25,125,50]",  # example from class
+            label="List of process sizes, formatted as an array, contained within [], separated by commas",
+            interactive=True  # can be changed for other examples
+        )
+
+        # multiple choice for what determinant should be used for best algorithm
+        determinantChoices = gr.Radio(determinants, label = "Determinant Choices", interactive=True)
+
+        calculate = gr.Button(value="Calculate!")
+
+        # output results
+        output = gr.Textbox(label="Output", interactive=False, autoscroll=False)
+        calculate.click(formatOutput, inputs=[freeBlocks, processesArray, determinantChoices], outputs=output,
+                        concurrency_limit=concurrencyLimit)
+
+        # collapsable window for showing extra details for specific algorithms
+        with gr.Accordion("Open for memory allocations by algorithm!", open=False):
+            # multiple choice for algorithm
+            algs = gr.Radio(choices=algorithmChoices, label="Algorithm Options", interactive=True)
+
+            # large inputs are shown pageSize blocks and processes at a time
+            page = gr.Number(value=1, precision=0, label=f"Page ({pageSize} blocks and processes per page)",
+                             interactive=True)
+
+            with gr.Row():
+                algBtn = gr.Button(value="Get alg specific allocations!")
+                diagram = gr.Button(value="Make allocation diagram")
+            with gr.Row():
+                # output results
+                textOutput = gr.Textbox(label="Output", interactive=False)
+                algBtn.click(furtherAllocationInformation, inputs=[freeBlocks, processesArray, algs, page],
+                             outputs=textOutput, concurrency_limit=concurrencyLimit)
+
+                diagram.click(createDiagram, inputs=[freeBlocks,processesArray, algs], outputs=gr.Image(type='pil'),
+                              concurrency_limit=concurrencyLimit)
+        gr.Markdown(footer)
+    return demo
+
+
+"""
+Start the GUI
+
+Args:
+    demo - gradio Blocks app from buildDemo
+"""
+
+
+def launch(demo):
+    # queue requests so heavy ones wait their turn instead of blocking everyone, show input/timeout errors to the user
+    demo.queue(max_size=maxQueueSize)
+    demo.launch(show_error=True)
@@ -0,0 +1,212 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from dynamicallocation import DynamicAllocation
+from memallocation import MemoryAllocation
+
+"""
+Snapshots of allocator state, so long simulations can be saved, restored and branched
+
+A snapshot is a compact binary file: a fixed header (snapshotHeader) with the counts and running totals, the algorithm
+name, then the state arrays as little endian 8 byte integers, in order:
+    blockCapacity, freeBlocks, blockProcessCounts - one entry per block
+    processSizes, processBlocks, processStarts - one entry per process
+    roundedSizes - (process number, allocated size) pairs
+    holes - (start, size) pairs in address order
+The holes are restored with setHoles: the ends of the blocks need nothing more than freeBlocks, a buddy allocation's
+chunks are put back in a BuddyHeap and DynamicAllocation's hole indexes (AddressIndex, holeSizes) are rebuilt in O(n).
+The other index structures of the one pass methods are built per call and are not part of the state.
+
+Restoring memory maps the file and copies each section straight from it into an array, so nothing is parsed value by
+value, then closes the mapping, so the restored allocator does not keep the file open.
+
+For "what if" comparisons without a file, fork() (MemoryAllocation, DynamicAllocation, AdaptiveAllocation) copies the
+state in memory and branchPolicies runs the rest of a trace from one warm state with every algorithm.
+
+Functions:
+    saveSnapshot(memoryAllocator, path) - writes a MemoryAllocation or DynamicAllocation to a snapshot file
+    loadSnapshot(path) - restores the allocator saved in a snapshot file
+    branchPolicies(memoryAllocator, events, algorithms) - runs events on a fork of a DynamicAllocation per algorithm
+"""
+
+# magic, format version, kind (0 MemoryAllocation, 1 DynamicAllocation), algorithm name length, checkMetrics,
+# then blocks, processes, rounded sizes, holes, totalMem, allocatedMem, occupiedFree, roundingWaste,
+# blocksScanned, executionTimeNs, failedAllocations, lastAllocated
+snapshotHeader = struct.Struct("<4sHBBB7x12q")
+snapshotMagic = b"MASN"
+snapshotVersion = 2
+snapshotKinds = {MemoryAllocation: 0, DynamicAllocation: 1}
+
+"""
+Write an allocator's state to a snapshot file
+
+Args:
+    memoryAllocator - MemoryAllocation or DynamicAllocation (not subclasses with more state, e.g. AdaptiveAllocation)
+    path - str, path to snapshot file
+"""
+
+
+def saveSnapshot(memoryAllocator, path):
+    kind = snapshotKinds.get(type(memoryAllocator))
+    if kind is None:
+        raise ValueError(f"cannot snapshot a {type(memoryAllocator).__name__}, expected MemoryAllocation or DynamicAllocation")
+    dynamic = kind == 1
+    algName = memoryAllocator.algName.encode() if dynamic else b""
+    rounded = array('q')
+    for processID, allocatedSize in memoryAllocator.roundedSizes.items():
+        rounded.extend((processID, allocatedSize))
+    holes = array('q')
+    for start, size in memoryAllocator.freeHoles():
+        holes.extend((start, size))
+    sections = [memoryAllocator.blockCapacity, memoryAllocator.freeBlocks, memoryAllocator.blockProcessCounts,
+                memoryAllocator.processSizes, memoryAllocator.processBlocks, memoryAllocator.processStarts, rounded,
+                holes]
+    with open(path, "wb") as file:
+        file.write(snapshotHeader.pack(
+            snapshotMagic, snapshotVersion, kind, len(algName), memoryAllocator.checkMetrics,
+            len(memoryAllocator.blockCapacity), len(memoryAllocator.processSizes), len(rounded) // 2, len(holes) // 2,
+            memoryAllocator.totalMem, memoryAllocator.allocatedMem, memoryAllocator.occupiedFree,
+            memoryAllocator.roundingWaste, memoryAllocator.blocksScanned, memoryAllocator.executionTimeNs,
+            getattr(memoryAllocator, "failedAllocations", 0), getattr(memoryAllocator, "lastAllocated", 0)))
+        # pad the name so the arrays start at a multiple of 8 bytes
+        file.write(algName + bytes(-len(algName) % 8))
+        for values in sections:
+            if sys.byteorder == "big":
+                values = array('q', values)
+                values.byteswap()
+            file.write(values)
+
+
+"""
+Restore an allocator from a snapshot file
+
+Args:
+    path - str, path to snapshot file
+
+Returns:
+    memoryAllocator - MemoryAllocation or DynamicAllocation, in the state it was saved in
+"""
+
+
+def loadSnapshot(path):
+    with open(path, "rb") as file:
+        # mmap cannot map an empty file
+        if os.fstat(file.fileno()).st_size < snapshotHeader.size:
+            raise ValueError(f"{path!r} is not a snapshot")
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            (magic, version, kind, nameLength, checkMetrics, blockCount, processCount, roundedCount, holeCount,
+             totalMem, allocatedMem, occupiedFree, roundingWaste, blocksScanned, executionTimeNs, failedAllocations,
+             lastAllocated) = snapshotHeader.unpack_from(data)
+            if magic != snapshotMagic or version != snapshotVersion or kind not in (0, 1):
+                raise ValueError(f"{path!r} is not a version {snapshotVersion} snapshot")
+            dynamic = kind == 1
+            offset = snapshotHeader.size
+            algName = data[offset:offset + nameLength].decode()
+            offset += nameLength + (-nameLength % 8)
+            counts = [blockCount, blockCount, blockCount, processCount, processCount, processCount, 2 * roundedCount,
+                      2 * holeCount]
+            if len(data) != offset + 8 * sum(counts):
+                raise ValueError(f"{path!r} is truncated or has extra data")
+
+            # every section is copied out, no view of the mapping may be left when it is closed
+            sections = []
+            with memoryview(data) as view:
+                for count in counts:
+                    section = array('q')
+                    section.frombytes(view[offset:offset + 8 * count])
+                    offset += 8 * count
+                    if sys.byteorder == "big":
+                        section.byteswap()
+                    sections.append(section)
+    blockCapacity, freeBlocks, blockProcessCounts, processSizes, processBlocks, processStarts, rounded, holes = sections
+
+    cls = DynamicAllocation if dynamic else MemoryAllocation
+    memoryAllocator = cls.__new__(cls)
+    memoryAllocator.blockCapacity = blockCapacity
+    memoryAllocator.freeBlocks = freeBlocks
+    memoryAllocator.processSizes = processSizes
+    memoryAllocator.processBlocks = processBlocks
+    memoryAllocator.blocksScanned = blocksScanned
+    memoryAllocator.executionTimeNs = executionTimeNs
+    memoryAllocator.checkMetrics = bool(checkMetrics)
+    memoryAllocator.totalMem = totalMem
+    memoryAllocator.allocatedMem = allocatedMem
+    memoryAllocator.blockProcessCounts = blockProcessCounts
+    memoryAllocator.occupiedFree = occupiedFree
+    memoryAllocator.roundedSizes = {rounded[i]: rounded[i + 1] for i in range(0, len(rounded), 2)}
+    memoryAllocator.roundingWaste = roundingWaste
+    memoryAllocator.blockStarts = array('q')
+    address = 0
+    for blockSize in blockCapacity:
+        memoryAllocator.blockStarts.append(address)
+        address += blockSize
+    memoryAllocator.processStarts = processStarts
+    if dynamic:
+        memoryAllocator.algName = algName
+        memoryAllocator.lastAllocated = lastAllocated
+        memoryAllocator.failedAllocations = failedAllocations
+    # DynamicAllocation builds its holes for its algorithm
+    memoryAllocator.setHoles((holes[i], holes[i + 1]) for i in range(0, len(holes), 2))
+    return memoryAllocator
+
+
+"""
+Branch a "what if" comparison: run the rest of a trace from the same warm state with every algorithm
+
+Args:
+    memoryAllocator - DynamicAllocation, state to branch from (left unchanged)
+    events - list, ("allocate", processID, size) / ("free", processID) events to run on each branch
+    algorithms - list, algorithms to compare, None compares every fit (DynamicAllocation.fitAlgorithms); a buddy
+                 allocator's holes are its chunks, so it only branches to buddy
+
+Returns:
+    branches - dictionary, by algorithm, the branch's DynamicAllocation after the events
+"""
+
+
+def branchPolicies(memoryAllocator, events, algorithms=None):
+    events = list(events)
+    # a buddy allocator's holes are its chunks, it can only go on with buddy
+    allowed = ["buddy"] if memoryAllocator.algName == "buddy" else DynamicAllocation.fitAlgorithms
+    algorithms = allowed if algorithms is None else algorithms
+    for algName in algorithms:
+        if algName not in allowed:
+            raise ValueError(f"cannot branch a {memoryAllocator.algName} allocator to {algName!r}, "
+                             f"expected one of {allowed}")
+    branches = {}
+    for algName in algorithms:
+        branch = memoryAllocator.fork()
+        branch.algName = algName
+        for event in events:
+            if event[0] == "allocate":
+                branch.allocate(event[1], event[2])
+            # processes that could not be allocated in this branch have nothing to free
+            elif event[1] < len(branch.processBlocks) and branch.processBlocks[event[1]] != -1:
+                branch.free(event[1])
+        branches[algName] = branch
+    return branches
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    from benchmark import generateChurn
+
+    blocksExample, eventsExample = generateChurn("bimodal", 1000, 20000)
+    # warm up on the first half of the trace, then save and branch
+    warmAllocator = DynamicAllocation(blocksExample, "first fit")
+    for event in eventsExample[:10000]:
+        if event[0] == "allocate":
+            warmAllocator.allocate(event[1], event[2])
+        elif warmAllocator.processBlocks[event[1]] != -1:
+            warmAllocator.free(event[1])
+    with tempfile.TemporaryDirectory() as directory:
+        snapshotPath = os.path.join(directory, "warm.snapshot")
+        saveSnapshot(warmAllocator, snapshotPath)
+        restoredAllocator = loadSnapshot(snapshotPath)
+    print(f"Restored state matches: {restoredAllocator.metrics() == warmAllocator.metrics()}")
+    for algName, branch in branchPolicies(restoredAllocator, eventsExample[10000:]).items():
+        print(f"{algName}: {branch.failedAllocations} failed allocations, metrics {branch.metrics()}")
@@ -0,0 +1,221 @@
+import json
+import mmap
+import os
+import struct
+
+"""
+Reading workload inputs and allocation traces without eval()
+
+Traces are streams of events for DynamicAllocation, ("allocate", processID, size) or ("free", processID). Files are
+memory mapped and read one record at a time, events are yielded in chunks so a trace of any size runs in constant
+memory. Supported formats (picked from the file extension unless given):
+    csv - one event per line: allocate,processID,size or free,processID (an optional header line starting with "event")
+    jsonl - one JSON object per line: {"event": "allocate", "process": 3, "size": 100} or {"event": "free", "process": 3}
+    bin - fixed size little endian records of (event code, processID, size), see binaryRecord
+
+Functions:
+    parseSizes(text) - given a list of sizes typed as text ("[50,150,300]"), returns list of ints
+    readTrace(path, traceFormat, chunkSize) - yields lists of up to chunkSize events from a trace file
+    traceEvents(path, traceFormat, chunkSize) - yields events one at a time from a trace file
+    writeBinaryTrace(path, events) - writes events to a binary trace file
+"""
+
+# event code (0 allocate, 1 free), process number, size (0 for free events)
+binaryRecord = struct.Struct("<Bqq")
+eventCodes = {"allocate": 0, "free": 1}
+eventNames = {code: name for name, code in eventCodes.items()}
+traceFormats = {".csv": "csv", ".jsonl": "jsonl", ".bin": "bin", ".trace": "bin"}
+
+"""
+Parse a list of sizes typed as text, replaces eval() on user input. Sizes must be whole numbers of 0 or more, anything
+else raises ValueError
+
+Args:
+    text - str, sizes separated by commas, optionally within []
+
+Returns:
+    sizes - list, int sizes
+"""
+
+
+def parseSizes(text):
+    text = text.strip()
+    if text.startswith("[") and text.endswith("]"):
+        text = text[1:-1]
+    sizes = []
+    for item in text.split(","):
+        item = item.strip()
+        if item:
+            try:
+                size = int(item)
+            except ValueError:
+                raise ValueError(f"{item!r} is not a whole number")
+            if size < 0:
+                raise ValueError(f"{size} is negative")
+            sizes.append(size)
+    return sizes
+
+
+"""
+Build an event tuple from its parts
+
+Args:
+    event - str, "allocate" or "free"
+    processID - int, process number
+    size - int, process size (unused for free events)
+
+Returns:
+    event - tuple, ("allocate", processID, size) or ("free", processID)
+"""
+
+
+def makeEvent(event, processID, size):
+    if event == "allocate":
+        return "allocate", processID, size
+    if event == "free":
+        return "free", processID
+    raise ValueError(f"unknown event {event!r}, expected 'allocate' or 'free'")
+
+
+"""
+Parse one line of a csv trace
+
+Args:
+    line - bytes, one line of the file
+
+Returns:
+    event - tuple, None for blank and header lines, raises ValueError for malformed lines
+"""
+
+
+def parseCsvLine(line):
+    fields = line.decode().strip().split(",")
+    if not fields[0] or fields[0] == "event":
+        return None
+    if len(fields) < 2:
+        raise ValueError("expected event,processID[,size]")
+    size = int(fields[2]) if len(fields) > 2 and fields[2] else 0
+    return makeEvent(fields[0], int(fields[1]), size)
+
+
+"""
+Parse one line of a jsonl trace
+
+Args:
+    line - bytes, one line of the file
+
+Returns:
+    event - tuple, None for blank lines, raises ValueError for malformed lines
+"""
+
+
+def parseJsonLine(line):
+    if not line.strip():
+        return None
+    record = json.loads(line)
+    if not isinstance(record, dict):
+        raise ValueError('expected {"event": ..., "process": ...}')
+    for field in ("event", "process"):
+        if field not in record:
+            raise ValueError(f"record is missing {field!r}")
+    try:
+        return makeEvent(record["event"], int(record["process"]), int(record.get("size", 0)))
+    except TypeError:
+        raise ValueError("process and size must be whole numbers")
+
+
+"""
+Read a trace file in chunks of events
+
+Args:
+    path - str, path to trace file
+    traceFormat - str, "csv", "jsonl" or "bin", None to pick from the file extension
+    chunkSize - int, largest number of events per chunk
+
+Yields:
+    chunk - list, up to chunkSize events
+"""
+
+
+def readTrace(path, traceFormat=None, chunkSize=65536):
+    if traceFormat is None:
+        extension = os.path.splitext(path)[1].lower()
+        if extension not in traceFormats:
+            raise ValueError(f"unknown trace format for {path!r}, expected one of {list(traceFormats)}")
+        traceFormat = traceFormats[extension]
+    # mmap cannot map an empty file
+    if os.path.getsize(path) == 0:
+        return
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        if traceFormat == "bin":
+            if len(data) % binaryRecord.size:
+                raise ValueError(f"{path!r} is not a whole number of {binaryRecord.size} byte records")
+            recordsPerChunk = chunkSize * binaryRecord.size
+            for offset in range(0, len(data), recordsPerChunk):
+                records = binaryRecord.iter_unpack(data[offset:offset + recordsPerChunk])
+                try:
+                    chunk = [makeEvent(eventNames.get(code), processID, size) for code, processID, size in records]
+                except ValueError:
+                    # find the bad record again, only on the error path
+                    records = binaryRecord.iter_unpack(data[offset:offset + recordsPerChunk])
+                    for recordNumber, (code, processID, size) in enumerate(records, offset // binaryRecord.size + 1):
+                        if code not in eventNames:
+                            raise ValueError(f"{path}: record {recordNumber}: unknown event code {code}")
+                    raise
+                yield chunk
+            return
+        if traceFormat == "csv":
+            parseLine = parseCsvLine
+        elif traceFormat == "jsonl":
+            parseLine = parseJsonLine
+        else:
+            raise ValueError(f"unknown trace format {traceFormat!r}, expected 'csv', 'jsonl' or 'bin'")
+        chunk = []
+        for lineNumber, line in enumerate(iter(data.readline, b""), 1):
+            try:
+                event = parseLine(line)
+            except ValueError as error:
+                # errors name the line, as cli.py does for workloads
+                raise ValueError(f"{path}:{lineNumber}: {error}")
+            if event is None:
+                continue
+            chunk.append(event)
+            if len(chunk) == chunkSize:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+"""
+Read a trace file one event at a time, e.g. DynamicAllocation(blocks).run(traceEvents(path))
+
+Args:
+    path - str, path to trace file
+    traceFormat - str, "csv", "jsonl" or "bin", None to pick from the file extension
+    chunkSize - int, number of events read at a time
+
+Yields:
+    event - tuple, ("allocate", processID, size) or ("free", processID)
+"""
+
+
+def traceEvents(path, traceFormat=None, chunkSize=65536):
+    for chunk in readTrace(path, traceFormat, chunkSize):
+        yield from chunk
+
+
+"""
+Write events to a binary trace file
+
+Args:
+    path - str, path to trace file
+    events - iterable, ("allocate", processID, size) or ("free", processID) tuples
+"""
+
+
+def writeBinaryTrace(path, events):
+    with open(path, "wb") as file:
+        for event in events:
+            size = event[2] if event[0] == "allocate" else 0
+            file.write(binaryRecord.pack(eventCodes[event[0]], event[1], size))